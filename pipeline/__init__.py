@@ -0,0 +1,9 @@
+"""降噪 ingestion pipeline.
+
+Turns channel listings from ``config/sources.yaml`` into archived items under
+``content-archive/<date>/<platform>_<source>_<id>/`` (``metadata.md``,
+``transcript.md``, ``rewritten.md`` and a cover image).
+
+Dependencies are listed in ``requirements.txt``: PyYAML, plus the ``yt-dlp``
+CLI on ``PATH`` for YouTube and Bilibili.
+"""
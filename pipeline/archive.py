@@ -0,0 +1,133 @@
+"""Archive layout and ``metadata.md`` front matter.
+
+Each processed video lives in
+``content-archive/<processed date>/<platform>_<source slug>_<id>/`` next to its
+``metadata.md``, ``transcript.md``, ``rewritten.md`` and ``cover.*``.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # pragma: no cover - libyaml is optional
+    from yaml import SafeLoader as _Loader  # type: ignore[assignment]
+
+from .config import Source
+
+COVER_NAMES = ("cover.jpg", "cover.webp", "cover.png")
+
+
+@dataclass
+class Item:
+    """A single video/episode discovered in a source listing."""
+
+    platform: str
+    source: Source
+    id: str
+    title: str
+    url: str
+    duration_seconds: int = 0
+    published_at: str = ""
+    cover_url: str = ""
+    extra: dict[str, Any] = field(default_factory=dict)
+    # Filled in by the pipeline as stages complete.
+    dir: Path | None = None
+    captions_path: Path | None = None
+    completed: set[str] = field(default_factory=set)
+
+    @property
+    def key(self) -> str:
+        return f"{self.platform}:{self.id}"
+
+
+def item_dir(output_dir: Path, item: Item, day: date | None = None) -> Path:
+    day = day or date.today()
+    return output_dir / day.isoformat() / f"{item.platform}_{item.source.slug}_{item.id}"
+
+
+def format_duration(seconds: int) -> str:
+    h, rem = divmod(int(seconds), 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+def find_cover(path: Path) -> Path | None:
+    for name in COVER_NAMES:
+        candidate = path / name
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def read_front_matter(path: Path) -> dict[str, Any]:
+    """Parse the ``---``-delimited YAML block at the top of a markdown file."""
+    lines: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        if f.readline().strip() != "---":
+            return {}
+        for line in f:
+            if line.strip() == "---":
+                break
+            lines.append(line)
+    return yaml.load("".join(lines), Loader=_Loader) or {}
+
+
+def update_front_matter(path: Path, **changes: Any) -> None:
+    """Rewrite selected front-matter keys, keeping the markdown body intact."""
+    text = path.read_text(encoding="utf-8")
+    meta: dict[str, Any] = {}
+    body = text
+    if text.startswith("---\n"):
+        end = text.find("\n---", 4)
+        if end != -1:
+            meta = yaml.load(text[4:end], Loader=_Loader) or {}
+            body = text[end + 4 :].lstrip("\n")
+    meta.update(changes)
+    write_front_matter(path, meta, body)
+
+
+def _dump_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return json.dumps(value, ensure_ascii=False)
+
+
+def write_front_matter(path: Path, meta: dict[str, Any], body: str = "") -> None:
+    out = ["---"]
+    out.extend(f"{key}: {_dump_value(value)}" for key, value in meta.items())
+    out.append("---")
+    text = "\n".join(out) + "\n"
+    if body:
+        text += "\n" + body
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+def build_metadata(item: Item, processed_at: date | None = None) -> dict[str, Any]:
+    meta: dict[str, Any] = {
+        "id": item.id,
+        "title": item.title,
+        "original_title": item.title,
+        "platform": item.platform,
+        "url": item.url,
+        "published_at": item.published_at,
+        "duration": format_duration(item.duration_seconds),
+        "duration_seconds": item.duration_seconds,
+        "channel": item.source.name,
+    }
+    meta.update(item.extra)
+    meta["tags"] = item.source.tags
+    meta["processed_at"] = (processed_at or date.today()).isoformat()
+    meta.setdefault("synced_to_feishu", False)
+    return meta
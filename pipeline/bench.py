@@ -0,0 +1,370 @@
+"""Offline benchmark of the pipeline's per-item work, on the archived corpus.
+
+The fixtures are ``output/temp._bBRVNkAfkQ.en.vtt`` and the items already in
+``content-archive/``.  They are copied into a scratch archive and scaled up to
+``--episodes`` synthetic episodes (ids suffixed, covers made byte-distinct),
+then each stage is timed over all of them:
+
+    vtt                 VTT parsing and cleaning into transcript.md
+    frontmatter         metadata.md front-matter parse and rewrite
+    cover-write         the scheduler's download_cover: fetch (from a file:// URL,
+                        so no network), format sniffing and the write
+    cover-hash          cover lookup and hashing, as the manifest does
+    feishu              Bitable record serialization through the tests' mock client
+    site-render-cold    compileArticle + SSR of every body, cache cold
+    site-render-cached  the same with the compiled-article cache warm
+    site-cover-disk     cover-cache.ts getCover served from its disk tier
+    site-cover-memory   cover-cache.ts getCover served from memory
+
+The ``site-*`` stages run the site's own TypeScript through
+``site/scripts/bench.ts`` (``npm run bench``, with the ``tsx`` pinned in the
+site's lockfile); they are skipped when the site's dependencies are not
+installed.  Timings are the best of ``--repeat`` runs;
+peak memory is measured in a separate tracemalloc pass so it doesn't skew
+the timings (for site stages: heap growth over one run).  Results are
+compared against a stored baseline JSON and any stage that got slower or
+hungrier than ``--tolerance`` is reported as a regression (exit status 1).
+
+Usage::
+
+    python -m pipeline.bench [--episodes 200] [--only vtt,site-render-cold]
+                             [--save-baseline] [--profile DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from . import vtt
+from .archive import Item, find_cover, read_front_matter, update_front_matter, write_front_matter
+from .config import ROOT, Config, Settings, Source
+from .feishu import sync_pending
+from .manifest import Manifest, file_hash
+from .scheduler import Context, download_cover
+
+# The mock transport is shared with the test suite; run from the repo root.
+from tests.fakes import MockFeishuClient
+
+FIXTURE_VTT = ROOT / "output" / "temp._bBRVNkAfkQ.en.vtt"
+FIXTURE_ARCHIVE = ROOT / "content-archive"
+DEFAULT_BASELINE = ROOT / "bench-baseline.json"
+SITE_DIR = ROOT / "site"
+SITE_STAGES = ("site-render-cold", "site-render-cached", "site-cover-disk", "site-cover-memory")
+
+
+# -- corpus -------------------------------------------------------------------
+
+
+@dataclass
+class Corpus:
+    root: Path
+    vtt: Path
+    items: list[Path] = field(default_factory=list)
+
+    @property
+    def archive(self) -> Path:
+        return self.root / "archive"
+
+
+def build_corpus(root: Path, episodes: int) -> Corpus:
+    """Copy the fixture items ``episodes`` times over into a scratch archive."""
+    fixtures = sorted(p.parent for p in FIXTURE_ARCHIVE.glob("*/*/metadata.md"))
+    if not fixtures:
+        raise SystemExit(f"no fixture items under {FIXTURE_ARCHIVE}")
+    corpus = Corpus(root=root, vtt=FIXTURE_VTT)
+    for i in range(episodes):
+        src = fixtures[i % len(fixtures)]
+        dst = corpus.archive / src.parent.name / f"{src.name}_{i:04d}"
+        dst.mkdir(parents=True)
+        for name in ("transcript.md", "rewritten.md"):
+            if (src / name).exists():
+                shutil.copyfile(src / name, dst / name)
+        cover = find_cover(src)
+        if cover:
+            # Trailing bytes keep the image valid but give every copy its own hash
+            (dst / cover.name).write_bytes(cover.read_bytes() + i.to_bytes(4, "big"))
+        meta = read_front_matter(src / "metadata.md")
+        meta["id"] = f"{meta.get('id')}_{i:04d}"
+        meta.pop("feishu_record_id", None)
+        meta["synced_to_feishu"] = False
+        write_front_matter(dst / "metadata.md", meta)
+        corpus.items.append(dst)
+    return corpus
+
+
+# -- stages -------------------------------------------------------------------
+
+
+def bench_vtt(corpus: Corpus, state: Any) -> int:
+    out = corpus.root / "vtt-out.md"
+    for _ in corpus.items:
+        vtt.convert(corpus.vtt, out)
+    return corpus.vtt.stat().st_size * len(corpus.items)
+
+
+def bench_frontmatter(corpus: Corpus, state: Any) -> int:
+    total = 0
+    for d in corpus.items:
+        path = d / "metadata.md"
+        meta = read_front_matter(path)
+        update_front_matter(path, processed_at=meta.get("processed_at"))
+        total += path.stat().st_size
+    return total
+
+
+def setup_cover_write(corpus: Corpus) -> tuple[Context, list[Item], int]:
+    out = corpus.root / "covers"
+    shutil.rmtree(out, ignore_errors=True)
+    ctx = Context(Config(Settings(output_dir=out), [], {}), platforms={}, limiters={})
+    source = Source(platform="bench", name="Bench", min_duration=0)
+    items: list[Item] = []
+    total = 0
+    for d in corpus.items:
+        cover = find_cover(d)
+        if cover is None:
+            continue
+        item = Item(platform="bench", source=source, id=d.name, title="", url="", cover_url=cover.as_uri())
+        item.dir = out / d.name
+        item.dir.mkdir(parents=True)
+        items.append(item)
+        total += cover.stat().st_size
+    return ctx, items, total
+
+
+def bench_cover_write(corpus: Corpus, state: tuple[Context, list[Item], int]) -> int:
+    ctx, items, total = state
+
+    async def run() -> None:
+        for item in items:
+            await download_cover(item, ctx)
+
+    asyncio.run(run())
+    return total
+
+
+def bench_cover_hash(corpus: Corpus, state: Any) -> int:
+    total = 0
+    for d in corpus.items:
+        cover = find_cover(d)
+        if cover is None:
+            continue
+        file_hash(cover)
+        total += cover.stat().st_size
+    return total
+
+
+def setup_feishu(corpus: Corpus) -> Manifest:
+    manifest = Manifest.for_archive(corpus.archive)
+    with manifest.db:
+        manifest.db.execute("UPDATE items SET synced_hash = NULL, feishu_record_id = NULL")
+    return manifest
+
+
+def bench_feishu(corpus: Corpus, manifest: Manifest) -> int:
+    client = MockFeishuClient()
+    try:
+        sync_pending(manifest, client)
+    finally:
+        manifest.close()
+    return client.bytes_sent
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Corpus, Any], int]
+    # Untimed per-run preparation; its result is passed to ``run``.
+    setup: Callable[[Corpus], Any] | None = None
+
+
+STAGES = [
+    Stage("vtt", bench_vtt),
+    Stage("frontmatter", bench_frontmatter),
+    Stage("cover-write", bench_cover_write, setup_cover_write),
+    Stage("cover-hash", bench_cover_hash),
+    Stage("feishu", bench_feishu, setup_feishu),
+]
+
+
+# -- measurement --------------------------------------------------------------
+
+
+@dataclass
+class Result:
+    stage: str
+    items: int
+    seconds: float
+    bytes: int
+    peak_mb: float
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def line(self) -> str:
+        return (
+            f"{self.stage:<18} items={self.items:<5} best={self.seconds:7.3f}s "
+            f"throughput={self.items_per_sec:8.1f}/s {self.mb_per_sec:7.1f}MB/s peak={self.peak_mb:7.2f}MB"
+        )
+
+
+def _once(stage: Stage, corpus: Corpus) -> tuple[float, int]:
+    state = stage.setup(corpus) if stage.setup else None
+    gc.collect()
+    started = time.perf_counter()
+    processed = stage.run(corpus, state)
+    return time.perf_counter() - started, processed
+
+
+def measure(stage: Stage, corpus: Corpus, repeat: int) -> Result:
+    runs = [_once(stage, corpus) for _ in range(repeat)]
+    seconds, processed = min(runs)
+
+    state = stage.setup(corpus) if stage.setup else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        stage.run(corpus, state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(stage.name, len(corpus.items), seconds, processed, peak / 1e6)
+
+
+def profile(stage: Stage, corpus: Corpus, out_dir: Path) -> Path:
+    """Write a cProfile dump; view with snakeviz or turn into a flamegraph with flameprof."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state = stage.setup(corpus) if stage.setup else None
+    profiler = cProfile.Profile()
+    profiler.runcall(stage.run, corpus, state)
+    path = out_dir / f"{stage.name}.prof"
+    profiler.dump_stats(path)
+    return path
+
+
+def site_available() -> bool:
+    return (SITE_DIR / "node_modules" / ".bin" / "tsx").exists() and shutil.which("npm") is not None
+
+
+def run_site(corpus: Corpus, repeat: int, wanted: set[str], profile_dir: Path | None) -> list[Result]:
+    """Run ``site/scripts/bench.ts`` on the corpus and collect its stages."""
+    env = dict(os.environ)
+    if profile_dir is not None:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        # .cpuprofile files open in Chrome DevTools or speedscope as flamegraphs
+        env["NODE_OPTIONS"] = f"{env.get('NODE_OPTIONS', '')} --cpu-prof --cpu-prof-dir={profile_dir.resolve()}".strip()
+    proc = subprocess.run(
+        ["npm", "run", "--silent", "bench", "--", str(corpus.archive), str(repeat)],
+        cwd=SITE_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"site benchmark failed:\n{proc.stderr.strip()[-2000:]}")
+    stages = json.loads(proc.stdout.strip().splitlines()[-1])["stages"]
+    return [
+        Result(name, int(r["items"]), float(r["seconds"]), int(r["bytes"]), float(r["peak_mb"]))
+        for name, r in stages.items()
+        if name in wanted
+    ]
+
+
+def compare(results: list[Result], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Stages whose per-item time or peak memory grew beyond ``tolerance``."""
+    regressions = []
+    for r in results:
+        base = baseline.get("stages", {}).get(r.stage)
+        if not base:
+            continue
+        per_item = r.seconds / max(1, r.items)
+        base_per_item = base["seconds"] / max(1, base["items"])
+        if per_item > base_per_item * (1 + tolerance):
+            regressions.append(f"{r.stage}: {per_item * 1000:.2f}ms/item vs {base_per_item * 1000:.2f}ms baseline")
+        if r.peak_mb > base["peak_mb"] * (1 + tolerance) and r.peak_mb - base["peak_mb"] > 1:
+            regressions.append(f"{r.stage}: peak {r.peak_mb:.1f}MB vs {base['peak_mb']:.1f}MB baseline")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on the archived corpus")
+    parser.add_argument("--episodes", type=int, default=200, help="synthetic episodes (default: 200)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, best is kept")
+    parser.add_argument(
+        "--only", help="comma-separated stages: " + ",".join([*(s.name for s in STAGES), *SITE_STAGES])
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--profile", type=Path, metavar="DIR", help="write a cProfile dump per stage to DIR")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    wanted = set(args.only.split(",")) if args.only else {*(s.name for s in STAGES), *SITE_STAGES}
+    stages = [s for s in STAGES if s.name in wanted]
+    site_wanted = wanted & set(SITE_STAGES)
+
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp:
+        started = time.monotonic()
+        corpus = build_corpus(Path(tmp), args.episodes)
+        print(f"corpus: {len(corpus.items)} episodes in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+        results = []
+        for stage in stages:
+            result = measure(stage, corpus, args.repeat)
+            results.append(result)
+            if not args.json:
+                print(result.line())
+            if args.profile:
+                print(f"  profile: {profile(stage, corpus, args.profile)}", file=sys.stderr)
+
+        if site_wanted and site_available():
+            for result in run_site(corpus, args.repeat, site_wanted, args.profile):
+                results.append(result)
+                if not args.json:
+                    print(result.line())
+        elif site_wanted:
+            print("site stages skipped: run `npm install && npx prisma generate` in site/", file=sys.stderr)
+
+    report = {
+        "episodes": args.episodes,
+        "python": platform.python_version(),
+        "stages": {r.stage: {k: v for k, v in asdict(r).items() if k != "stage"} for r in results},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"✓ baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+    for line in regressions:
+        print(f"✗ regression: {line}")
+    if not regressions:
+        print(f"✓ no regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Loader for ``config/sources.yaml``."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG = ROOT / "config" / "sources.yaml"
+
+# Per-platform politeness: how many requests may be in flight at once and how
+# many may start per second.  Overridable via ``settings.platform_limits``.
+# ``cdn`` covers thumbnail hosts (i.ytimg.com, hdslb.com, ...), which are
+# limited separately so cover downloads don't eat into platform budgets.
+DEFAULT_PLATFORM_LIMITS: dict[str, dict[str, float]] = {
+    "youtube": {"concurrency": 4, "rate_per_sec": 2.0},
+    "bilibili": {"concurrency": 2, "rate_per_sec": 1.0},
+    "xiaoyuzhou": {"concurrency": 2, "rate_per_sec": 1.0},
+    "cdn": {"concurrency": 8, "rate_per_sec": 10.0},
+}
+
+
+@dataclass
+class Source:
+    platform: str
+    name: str
+    min_duration: int
+    tags: list[str] = field(default_factory=list)
+    url: str | None = None
+    uid: str | None = None
+    podcast_id: str | None = None
+    enabled: bool = True
+
+    @property
+    def slug(self) -> str:
+        """Directory-name fragment, e.g. ``Sequoia`` for "Sequoia Capital"."""
+        head = self.name.split()[0] if self.name.split() else self.name
+        return "".join(ch for ch in head if ch.isalnum()) or "Source"
+
+
+@dataclass
+class Settings:
+    output_dir: Path
+    auto_sync_feishu: bool = True
+    download_covers: bool = True
+    default_min_duration: int = 30
+    default_batch_limit: int = 10
+    platform_limits: dict[str, dict[str, float]] = field(
+        default_factory=lambda: {k: dict(v) for k, v in DEFAULT_PLATFORM_LIMITS.items()}
+    )
+
+
+@dataclass
+class Config:
+    settings: Settings
+    sources: list[Source]
+    api_keys: dict[str, Any]
+
+    def enabled_sources(self) -> list[Source]:
+        return [s for s in self.sources if s.enabled]
+
+
+def load_config(path: Path = DEFAULT_CONFIG) -> Config:
+    with open(path, encoding="utf-8") as f:
+        raw = yaml.safe_load(f) or {}
+
+    s = raw.get("settings") or {}
+    limits = {k: dict(v) for k, v in DEFAULT_PLATFORM_LIMITS.items()}
+    for platform, override in (s.get("platform_limits") or {}).items():
+        limits.setdefault(platform, {}).update(override)
+
+    output_dir = Path(s.get("output_dir", "./content-archive"))
+    if not output_dir.is_absolute():
+        output_dir = (path.parent.parent / output_dir).resolve()
+
+    settings = Settings(
+        output_dir=output_dir,
+        auto_sync_feishu=s.get("auto_sync_feishu", True),
+        download_covers=s.get("download_covers", True),
+        default_min_duration=s.get("default_min_duration", 30),
+        default_batch_limit=s.get("default_batch_limit", 10),
+        platform_limits=limits,
+    )
+
+    sources: list[Source] = []
+    for platform, entries in (raw.get("sources") or {}).items():
+        for entry in entries or []:
+            sources.append(
+                Source(
+                    platform=platform,
+                    name=entry["name"],
+                    min_duration=entry.get("min_duration", settings.default_min_duration),
+                    tags=list(entry.get("tags") or []),
+                    url=entry.get("url"),
+                    uid=str(entry["uid"]) if "uid" in entry else None,
+                    podcast_id=entry.get("podcast_id"),
+                    enabled=entry.get("enabled", True),
+                )
+            )
+
+    return Config(settings=settings, sources=sources, api_keys=raw.get("api_keys") or {})
@@ -0,0 +1,286 @@
+"""Batched, delta-only sync of archived items into the Feishu Bitable.
+
+Only items whose rewritten body or cover changed since the last sync are
+pushed: new items go through ``records/batch_create`` and changed ones through
+``records/batch_update``, up to 500 records per request.  Covers are uploaded
+only for new records and when the cover itself changed.  After each request
+the manifest records the synced hashes and the returned ``record_id`` for that
+chunk, so a failure part-way never leaves created records unrecorded;
+``metadata.md`` gets ``synced_to_feishu`` / ``feishu_record_id`` updated to
+match.
+
+Usage::
+
+    python -m pipeline.feishu [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .archive import find_cover, read_front_matter, update_front_matter
+from .config import DEFAULT_CONFIG, load_config
+from .manifest import Entry, Manifest
+
+log = logging.getLogger("pipeline.feishu")
+
+API = "https://open.feishu.cn/open-apis"
+BATCH_SIZE = 500  # Bitable batch_create / batch_update limit
+
+PLATFORM_LABELS = {"youtube": "YouTube", "bilibili": "B站", "xiaoyuzhou": "小宇宙"}
+
+
+class FeishuError(RuntimeError):
+    pass
+
+
+class FeishuClient:
+    def __init__(self, app_id: str, app_secret: str, app_token: str, table_id: str):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.app_token = app_token
+        self.table_id = table_id
+        self._token: tuple[str, float] | None = None
+
+    @classmethod
+    def from_config(cls, api_keys: dict[str, Any]) -> "FeishuClient":
+        f = api_keys.get("feishu") or {}
+        return cls(f["app_id"], f["app_secret"], f["bitable_app_token"], f["table_id"])
+
+    def access_token(self) -> str:
+        if self._token and time.time() < self._token[1]:
+            return self._token[0]
+        data = self._send(
+            "POST", "/auth/v3/tenant_access_token/internal",
+            {"app_id": self.app_id, "app_secret": self.app_secret}, auth=False,
+        )
+        if data.get("code") != 0:
+            raise FeishuError(f"Feishu tenant_access_token failed: {data.get('msg')}")
+        self._token = (data["tenant_access_token"], time.time() + data["expire"] - 60)
+        return self._token[0]
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        body: dict[str, Any] | None = None,
+        auth: bool = True,
+        raw: bytes | None = None,
+        content_type: str = "application/json",
+    ) -> dict[str, Any]:
+        headers = {"Content-Type": content_type}
+        if auth:
+            headers["Authorization"] = f"Bearer {self.access_token()}"
+        data = raw if raw is not None else (json.dumps(body).encode() if body is not None else None)
+        req = urllib.request.Request(API + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=60) as res:
+                return json.loads(res.read())
+        except urllib.error.HTTPError as e:
+            # API errors come back as 4xx with a {code, msg} body; hand those
+            # to request() so they are retried or reported like any other.
+            try:
+                payload = json.loads(e.read())
+            except ValueError:
+                raise e from None
+            if not isinstance(payload, dict) or "code" not in payload:
+                raise
+            return payload
+
+    def request(self, method: str, path: str, body: dict[str, Any] | None = None, **kw: Any) -> dict[str, Any]:
+        payload = self._send(method, path, body, **kw)
+        # Retry once if token expired
+        if payload.get("code") != 0 and "access token" in str(payload.get("msg")):
+            self._token = None
+            payload = self._send(method, path, body, **kw)
+        if payload.get("code") != 0:
+            raise FeishuError(f"Feishu {path} failed: {payload.get('msg')}")
+        return payload.get("data") or {}
+
+    @property
+    def _records_path(self) -> str:
+        return f"/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records"
+
+    def batch_create(self, records: list[dict[str, Any]]) -> list[str]:
+        ids: list[str] = []
+        for i in range(0, len(records), BATCH_SIZE):
+            chunk = records[i : i + BATCH_SIZE]
+            data = self.request(
+                "POST", f"{self._records_path}/batch_create",
+                {"records": [{"fields": fields} for fields in chunk]},
+            )
+            ids.extend(r["record_id"] for r in data.get("records") or [])
+        return ids
+
+    def batch_update(self, records: list[tuple[str, dict[str, Any]]]) -> None:
+        for i in range(0, len(records), BATCH_SIZE):
+            chunk = records[i : i + BATCH_SIZE]
+            self.request(
+                "POST", f"{self._records_path}/batch_update",
+                {"records": [{"record_id": rid, "fields": fields} for rid, fields in chunk]},
+            )
+
+    def upload_image(self, path: Path) -> str:
+        """Upload a cover as a Bitable attachment and return its file token."""
+        boundary = uuid.uuid4().hex
+        content = path.read_bytes()
+        parts = []
+        for name, value in (
+            ("file_name", path.name),
+            ("parent_type", "bitable_image"),
+            ("parent_node", self.app_token),
+            ("size", str(len(content))),
+        ):
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{path.name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode()
+            + content
+            + b"\r\n"
+        )
+        parts.append(f"--{boundary}--\r\n".encode())
+        data = self.request(
+            "POST", "/drive/v1/medias/upload_all",
+            raw=b"".join(parts), content_type=f"multipart/form-data; boundary={boundary}",
+        )
+        return data["file_token"]
+
+
+# -- record building ----------------------------------------------------------
+
+
+def _section(body: str, title_re: str) -> str:
+    """Text of a ``## <title>`` section, or of a bare ``金句精选`` block."""
+    m = re.search(rf"(?:^|\n)(?:##\s*)?{title_re}[^\n]*\n([\s\S]*?)(?=\n##? |\n---\n|$)", body)
+    return m.group(1) if m else ""
+
+
+def extract_quotes(body: str, limit: int = 5) -> list[str]:
+    quotes = []
+    for line in _section(body, "金句").splitlines():
+        line = re.sub(r"^\s*(?:\d+[.、]|[-*>])\s*", "", line).strip().strip("\"“”")
+        if line:
+            quotes.append(line)
+    return quotes[:limit]
+
+
+def extract_guests(body: str) -> str:
+    guests = []
+    for m in re.finditer(r"^\*\*(.+?)\*\*\s*[-—:：]\s*(.+)$", _section(body, "嘉宾信息"), re.M):
+        role = re.split(r"[，。,]", m.group(2).strip())[0]
+        guests.append(f"{m.group(1).strip()}（{role}）")
+    return "，".join(guests)
+
+
+def extract_title(body: str, fallback: str) -> str:
+    m = re.match(r"\s*#\s+(.+)", body)
+    return m.group(1).strip() if m else fallback
+
+
+def publish_ms(published_at: str) -> int | None:
+    try:
+        day = datetime.strptime(str(published_at)[:10], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return int(day.timestamp() * 1000)
+
+
+def record_fields(item_dir: Path, meta: dict[str, Any]) -> dict[str, Any]:
+    body = (item_dir / "rewritten.md").read_text(encoding="utf-8")
+    fields: dict[str, Any] = {
+        "标题": extract_title(body, str(meta.get("title") or "")),
+        "原内容链接": {"link": meta.get("url") or "", "text": meta.get("original_title") or meta.get("title") or ""},
+        "平台来源": PLATFORM_LABELS.get(str(meta.get("platform")), str(meta.get("platform") or "")),
+        "标签": list(meta.get("tags") or []),
+        "摘要正文": body,
+    }
+    guests = extract_guests(body)
+    if guests:
+        fields["嘉宾"] = guests
+    published = publish_ms(str(meta.get("published_at") or ""))
+    if published:
+        fields["发布时间"] = published
+    for i, quote in enumerate(extract_quotes(body), start=1):
+        fields[f"金句{i}"] = quote
+    return fields
+
+
+# -- sync ---------------------------------------------------------------------
+
+
+def pending(manifest: Manifest) -> list[Entry]:
+    return [
+        e for e in manifest.entries()
+        if e.complete and e.rewritten_hash and e.synced_hash != e.sync_hash
+    ]
+
+
+def sync_pending(manifest: Manifest, client: FeishuClient, dry_run: bool = False) -> tuple[int, int]:
+    """Push new and changed items. Returns ``(created, updated)``."""
+    creates: list[tuple[Entry, dict[str, Any]]] = []
+    updates: list[tuple[Entry, dict[str, Any]]] = []
+    for entry in pending(manifest):
+        meta = read_front_matter(entry.dir / "metadata.md")
+        fields = record_fields(entry.dir, meta)
+        cover = find_cover(entry.dir)
+        cover_changed = not entry.feishu_record_id or entry.cover_hash != entry.synced_cover_hash
+        if cover and cover_changed and not dry_run:
+            fields["封面图"] = [{"file_token": client.upload_image(cover)}]
+        (updates if entry.feishu_record_id else creates).append((entry, fields))
+
+    log.info("feishu: %d to create, %d to update", len(creates), len(updates))
+    if dry_run:
+        return len(creates), len(updates)
+
+    for i in range(0, len(updates), BATCH_SIZE):
+        chunk = updates[i : i + BATCH_SIZE]
+        client.batch_update([(e.feishu_record_id or "", f) for e, f in chunk])
+        for entry, _ in chunk:
+            _mark_synced(manifest, entry, entry.feishu_record_id or "")
+    for i in range(0, len(creates), BATCH_SIZE):
+        chunk = creates[i : i + BATCH_SIZE]
+        ids = client.batch_create([f for _, f in chunk])
+        for (entry, _), record_id in zip(chunk, ids):
+            _mark_synced(manifest, entry, record_id)
+    return len(creates), len(updates)
+
+
+def _mark_synced(manifest: Manifest, entry: Entry, record_id: str) -> None:
+    manifest.set_feishu_record(entry.platform, entry.video_id, record_id, entry.sync_hash, entry.cover_hash)
+    update_front_matter(
+        entry.dir / "metadata.md", synced_to_feishu=True, feishu_record_id=record_id
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Sync new/changed archive items to Feishu Bitable")
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be synced")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = load_config(args.config)
+    manifest = Manifest.for_archive(config.settings.output_dir)
+    try:
+        created, updated = sync_pending(manifest, FeishuClient.from_config(config.api_keys), args.dry_run)
+    finally:
+        manifest.close()
+    print(f"✓ {created} created, {updated} updated")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Incremental ingestion manifest.
+
+A single SQLite file (``content-archive/manifest.sqlite``) keyed by
+``(platform, video_id)`` that records which pipeline stages have finished for
+each item, where it lives on disk and the content hashes of ``transcript.md``,
+``rewritten.md`` and the cover.  The scheduler asks it one indexed lookup per
+listed candidate instead of walking and parsing every ``metadata.md``.
+
+The manifest is derived data: if it is missing it is rebuilt from the
+``metadata.md`` files, and ``python -m pipeline.manifest --rebuild`` forces
+that.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from .archive import Item, find_cover, read_front_matter
+from .config import DEFAULT_CONFIG, load_config
+
+log = logging.getLogger("pipeline.manifest")
+
+MANIFEST_NAME = "manifest.sqlite"
+FINAL_STAGE = "metadata"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    platform          TEXT NOT NULL,
+    video_id          TEXT NOT NULL,
+    dir               TEXT NOT NULL,
+    stages            TEXT NOT NULL DEFAULT '[]',
+    failed_stage      TEXT,
+    error             TEXT,
+    transcript_hash   TEXT,
+    rewritten_hash    TEXT,
+    cover_hash        TEXT,
+    feishu_record_id  TEXT,
+    synced_hash       TEXT,
+    synced_cover_hash TEXT,
+    item              TEXT,
+    updated_at        REAL NOT NULL,
+    PRIMARY KEY (platform, video_id)
+) WITHOUT ROWID;
+"""
+
+# Columns added after the first release, applied to older manifests on open.
+MIGRATIONS = {
+    "synced_hash": "ALTER TABLE items ADD COLUMN synced_hash TEXT",
+    "synced_cover_hash": "ALTER TABLE items ADD COLUMN synced_cover_hash TEXT",
+}
+
+COLUMNS = (
+    "platform, video_id, dir, stages, failed_stage, error, transcript_hash,"
+    " rewritten_hash, cover_hash, feishu_record_id, synced_hash, item, synced_cover_hash"
+)
+
+# Which hash column a finished stage refreshes, and from which file.
+STAGE_HASHES = {
+    "transcript": ("transcript_hash", "transcript.md"),
+    "rewrite": ("rewritten_hash", "rewritten.md"),
+}
+
+
+def file_hash(path: Path) -> str | None:
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class Entry:
+    platform: str
+    video_id: str
+    dir: Path
+    stages: set[str] = field(default_factory=set)
+    failed_stage: str | None = None
+    error: str | None = None
+    transcript_hash: str | None = None
+    rewritten_hash: str | None = None
+    cover_hash: str | None = None
+    feishu_record_id: str | None = None
+    synced_hash: str | None = None
+    item: dict[str, Any] = field(default_factory=dict)
+    # Cover hash last uploaded to Feishu; the cover is re-uploaded only when it differs.
+    synced_cover_hash: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        return FINAL_STAGE in self.stages
+
+    @property
+    def sync_hash(self) -> str:
+        """What the Feishu record depends on: the rewritten body and the cover."""
+        return hashlib.sha256(f"{self.rewritten_hash}:{self.cover_hash}".encode()).hexdigest()
+
+
+class Manifest:
+    def __init__(self, path: Path, archive_dir: Path | None = None):
+        self.path = path
+        self.archive_dir = archive_dir or path.parent
+        existed = path.exists()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        have = {row[1] for row in self.db.execute("PRAGMA table_info(items)")}
+        for column, ddl in MIGRATIONS.items():
+            if column not in have:
+                self.db.execute(ddl)
+        if not existed:
+            count = self.rebuild()
+            log.info("manifest rebuilt from %d metadata.md files", count)
+
+    @classmethod
+    def for_archive(cls, archive_dir: Path) -> "Manifest":
+        return cls(archive_dir / MANIFEST_NAME, archive_dir)
+
+    def close(self) -> None:
+        self.db.close()
+
+    # -- reads ---------------------------------------------------------------
+
+    def get(self, platform: str, video_id: str) -> Entry | None:
+        row = self.db.execute(
+            f"SELECT {COLUMNS} FROM items WHERE platform = ? AND video_id = ?",
+            (platform, video_id),
+        ).fetchone()
+        return self._entry(row) if row else None
+
+    def entries(self) -> Iterator[Entry]:
+        for row in self.db.execute(f"SELECT {COLUMNS} FROM items"):
+            yield self._entry(row)
+
+    def _entry(self, row: tuple) -> Entry:
+        return Entry(
+            platform=row[0],
+            video_id=row[1],
+            dir=self.archive_dir / row[2],
+            stages=set(json.loads(row[3])),
+            failed_stage=row[4],
+            error=row[5],
+            transcript_hash=row[6],
+            rewritten_hash=row[7],
+            cover_hash=row[8],
+            feishu_record_id=row[9],
+            synced_hash=row[10],
+            item=json.loads(row[11]) if row[11] else {},
+            synced_cover_hash=row[12],
+        )
+
+    # -- writes --------------------------------------------------------------
+
+    def _rel(self, path: Path) -> str:
+        try:
+            return str(path.relative_to(self.archive_dir))
+        except ValueError:
+            return str(path)
+
+    def _upsert(self, platform: str, video_id: str, dir: Path, **cols: Any) -> None:
+        cols["updated_at"] = time.time()
+        names = ", ".join(cols)
+        marks = ", ".join("?" for _ in cols)
+        updates = ", ".join(f"{k} = excluded.{k}" for k in cols)
+        self.db.execute(
+            f"INSERT INTO items (platform, video_id, dir, {names}) VALUES (?, ?, ?, {marks})"
+            f" ON CONFLICT (platform, video_id) DO UPDATE SET dir = excluded.dir, {updates}",
+            (platform, video_id, self._rel(dir), *cols.values()),
+        )
+        self.db.commit()
+
+    def mark_stage(self, item: Item, stage: str) -> None:
+        assert item.dir is not None
+        entry = self.get(item.platform, item.id)
+        stages = entry.stages if entry else set()
+        stages.add(stage)
+        cols: dict[str, Any] = {
+            "stages": json.dumps(sorted(stages)),
+            "failed_stage": None,
+            "error": None,
+            "item": json.dumps(item_state(item), ensure_ascii=False),
+        }
+        if stage in STAGE_HASHES:
+            column, name = STAGE_HASHES[stage]
+            cols[column] = file_hash(item.dir / name)
+        elif stage == "cover":
+            cover = find_cover(item.dir)
+            cols["cover_hash"] = file_hash(cover) if cover else None
+        self._upsert(item.platform, item.id, item.dir, **cols)
+
+    def mark_failed(self, item: Item, stage: str, error: Exception | str) -> None:
+        assert item.dir is not None
+        entry = self.get(item.platform, item.id)
+        self._upsert(
+            item.platform, item.id, item.dir,
+            stages=json.dumps(sorted(entry.stages if entry else set())),
+            failed_stage=stage,
+            error=str(error)[:500],
+            item=json.dumps(item_state(item), ensure_ascii=False),
+        )
+
+    def set_feishu_record(
+        self, platform: str, video_id: str, record_id: str, synced_hash: str, cover_hash: str | None
+    ) -> None:
+        self.db.execute(
+            "UPDATE items SET feishu_record_id = ?, synced_hash = ?, synced_cover_hash = ?, updated_at = ?"
+            " WHERE platform = ? AND video_id = ?",
+            (record_id, synced_hash, cover_hash, time.time(), platform, video_id),
+        )
+        self.db.commit()
+
+    # -- rebuild -------------------------------------------------------------
+
+    def rebuild(self) -> int:
+        """Re-derive every entry from the ``metadata.md`` files on disk."""
+        rows = []
+        now = time.time()
+        for meta_path in sorted(self.archive_dir.glob("*/*/metadata.md")):
+            meta = read_front_matter(meta_path)
+            video_id = str(meta.get("id") or meta.get("video_id") or "")
+            platform = str(meta.get("platform") or meta_path.parent.name.split("_", 1)[0])
+            if not video_id:
+                log.warning("skipping %s: no id in front matter", meta_path)
+                continue
+            d = meta_path.parent
+            cover = find_cover(d)
+            stages = {"metadata"}
+            if (d / "transcript.md").exists():
+                stages |= {"captions", "transcript"}
+            if (d / "rewritten.md").exists():
+                stages.add("rewrite")
+            if cover:
+                stages.add("cover")
+            entry = Entry(
+                platform=platform,
+                video_id=video_id,
+                dir=d,
+                transcript_hash=file_hash(d / "transcript.md"),
+                rewritten_hash=file_hash(d / "rewritten.md"),
+                cover_hash=file_hash(cover) if cover else None,
+                feishu_record_id=meta.get("feishu_record_id") or None,
+            )
+            # Items already marked as synced are assumed to match Feishu.
+            is_synced = bool(meta.get("synced_to_feishu") and entry.feishu_record_id)
+            rows.append((
+                platform, video_id, self._rel(d), json.dumps(sorted(stages)),
+                entry.transcript_hash, entry.rewritten_hash, entry.cover_hash,
+                entry.feishu_record_id,
+                entry.sync_hash if is_synced else None,
+                entry.cover_hash if is_synced else None,
+                now,
+            ))
+        with self.db:
+            self.db.execute("DELETE FROM items")
+            self.db.executemany(
+                "INSERT OR REPLACE INTO items (platform, video_id, dir, stages, transcript_hash,"
+                " rewritten_hash, cover_hash, feishu_record_id, synced_hash, synced_cover_hash, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+
+def item_state(item: Item) -> dict[str, Any]:
+    """The bits of an Item that later stages need when resuming."""
+    return {
+        "title": item.title,
+        "url": item.url,
+        "duration_seconds": item.duration_seconds,
+        "published_at": item.published_at,
+        "cover_url": item.cover_url,
+        "extra": item.extra,
+    }
+
+
+def restore_item(item: Item, state: dict[str, Any]) -> None:
+    for key in ("title", "url", "duration_seconds", "published_at", "cover_url"):
+        if state.get(key):
+            setattr(item, key, state[key])
+    item.extra.update(state.get("extra") or {})
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the ingestion manifest")
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    parser.add_argument("--rebuild", action="store_true", help="re-derive from metadata.md files")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    manifest = Manifest.for_archive(load_config(args.config).settings.output_dir)
+    if args.rebuild:
+        print(f"✓ rebuilt {manifest.rebuild()} entries")
+    entries = list(manifest.entries())
+    done = sum(e.complete for e in entries)
+    failed = [e for e in entries if e.failed_stage]
+    print(f"{len(entries)} items, {done} complete, {len(failed)} failed")
+    for e in failed:
+        print(f"  {e.platform}:{e.video_id} failed at {e.failed_stage}: {e.error}")
+    manifest.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
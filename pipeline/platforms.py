@@ -0,0 +1,215 @@
+"""Per-platform listing and caption adapters.
+
+YouTube and Bilibili listings go through the ``yt-dlp`` CLI; Xiaoyuzhou
+listings are read from the podcast page's ``__NEXT_DATA__`` blob.  YouTube
+captions are auto-subs (VTT); Bilibili and Xiaoyuzhou transcripts come from
+BibiGPT, which is what ``transcript_source: "bibigpt"`` in the archive means.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Protocol
+
+from .archive import Item
+from .config import Source
+
+USER_AGENT = "Mozilla/5.0 (jiangzao-pipeline)"
+BIBIGPT_API = "https://api.bibigpt.co/api/open"
+HTTP_TIMEOUT = 60
+
+
+class PlatformError(RuntimeError):
+    pass
+
+
+async def http_get(url: str, timeout: float = HTTP_TIMEOUT) -> bytes:
+    def _get() -> bytes:
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(req, timeout=timeout) as res:
+            return res.read()
+
+    return await asyncio.to_thread(_get)
+
+
+async def run_ytdlp(*args: str) -> str:
+    proc = await asyncio.create_subprocess_exec(
+        "yt-dlp", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await proc.communicate()
+    if proc.returncode != 0:
+        raise PlatformError(f"yt-dlp failed: {err.decode(errors='replace').strip()[-300:]}")
+    return out.decode()
+
+
+class Platform(Protocol):
+    """A listing/caption adapter.
+
+    Adapters whose listings can omit durations also provide
+    ``async probe_duration(item) -> int``; the scheduler calls it before
+    applying ``min_duration`` to such items.
+    """
+
+    name: str
+
+    async def list_items(self, source: Source, limit: int) -> list[Item]: ...
+
+    async def fetch_captions(self, item: Item, dest: Path) -> Path: ...
+
+
+class YtDlpListing:
+    """Channel/space listing via ``yt-dlp --flat-playlist``."""
+
+    name = ""
+
+    def listing_url(self, source: Source) -> str:
+        raise NotImplementedError
+
+    def item_url(self, video_id: str) -> str:
+        raise NotImplementedError
+
+    async def list_items(self, source: Source, limit: int) -> list[Item]:
+        raw = await run_ytdlp(
+            "--flat-playlist", "-J", "--playlist-end", str(limit), self.listing_url(source)
+        )
+        items = []
+        for entry in json.loads(raw).get("entries") or []:
+            if not entry.get("id"):
+                continue
+            thumbs = entry.get("thumbnails") or []
+            items.append(
+                Item(
+                    platform=self.name,
+                    source=source,
+                    id=entry["id"],
+                    title=entry.get("title") or "",
+                    url=self.item_url(entry["id"]),
+                    duration_seconds=int(entry.get("duration") or 0),
+                    cover_url=thumbs[-1]["url"] if thumbs else "",
+                )
+            )
+        return items
+
+    async def probe_duration(self, item: Item) -> int:
+        """Duration from the item's own metadata (flat listings may omit it)."""
+        info = json.loads(await run_ytdlp("-J", "--skip-download", "--no-playlist", item.url))
+        return int(info.get("duration") or 0)
+
+
+class YouTube(YtDlpListing):
+    name = "youtube"
+
+    def listing_url(self, source: Source) -> str:
+        return f"{(source.url or '').rstrip('/')}/videos"
+
+    def item_url(self, video_id: str) -> str:
+        return f"https://www.youtube.com/watch?v={video_id}"
+
+    async def fetch_captions(self, item: Item, dest: Path) -> Path:
+        await run_ytdlp(
+            "--skip-download", "--write-info-json",
+            "--write-subs", "--write-auto-subs", "--sub-langs", "en.*,en",
+            "--sub-format", "vtt",
+            "-o", str(dest / "captions.%(ext)s"),
+            item.url,
+        )
+        info_path = dest / "captions.info.json"
+        if info_path.exists():
+            info = json.loads(info_path.read_text(encoding="utf-8"))
+            info_path.unlink()
+            upload = info.get("upload_date") or ""
+            if len(upload) == 8:
+                item.published_at = f"{upload[:4]}-{upload[4:6]}-{upload[6:]}"
+            item.cover_url = info.get("thumbnail") or item.cover_url
+            item.duration_seconds = int(info.get("duration") or 0) or item.duration_seconds
+            item.extra.update(views=info.get("view_count") or 0, likes=info.get("like_count") or 0)
+        vtts = sorted(dest.glob("captions*.vtt"))
+        if item.duration_seconds and item.duration_seconds < item.source.min_duration * 60:
+            for path in vtts:
+                path.unlink()
+            raise PlatformError(f"{item.id} is shorter than {item.source.min_duration} min")
+        if not vtts:
+            raise PlatformError(f"no English captions for {item.id}")
+        item.extra.update(transcript_language="en", transcript_source="auto-generated")
+        preferred = dest / "captions.en.vtt"
+        return preferred if preferred.exists() else vtts[0]
+
+
+class BibiGPTCaptions:
+    """Timestamped transcripts from BibiGPT for platforms without usable subs."""
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    async def fetch_captions(self, item: Item, dest: Path) -> Path:
+        if not self.api_key:
+            raise PlatformError("api_keys.bibigpt is not configured")
+        query = urllib.parse.urlencode({"url": item.url})
+        data = json.loads(await http_get(f"{BIBIGPT_API}/{self.api_key}/subtitle?{query}"))
+        detail = data.get("detail") or {}
+        cues = [
+            {"start": float(c.get("startTime") or 0), "text": (c.get("text") or "").strip()}
+            for c in detail.get("subtitlesArray") or []
+        ]
+        if not data.get("success", True) or not cues:
+            raise PlatformError(f"bibigpt returned no transcript for {item.id}")
+        path = dest / "captions.json"
+        path.write_text(json.dumps(cues, ensure_ascii=False), encoding="utf-8")
+        item.extra.update(
+            transcript_language=detail.get("language") or "zh-Hans",
+            transcript_source="bibigpt",
+        )
+        return path
+
+
+class Bilibili(YtDlpListing, BibiGPTCaptions):
+    name = "bilibili"
+
+    def listing_url(self, source: Source) -> str:
+        return f"https://space.bilibili.com/{source.uid}/video"
+
+    def item_url(self, video_id: str) -> str:
+        return f"https://www.bilibili.com/video/{video_id}"
+
+
+class Xiaoyuzhou(BibiGPTCaptions):
+    name = "xiaoyuzhou"
+
+    async def list_items(self, source: Source, limit: int) -> list[Item]:
+        html = (await http_get(f"https://www.xiaoyuzhoufm.com/podcast/{source.podcast_id}")).decode()
+        m = re.search(r'<script id="__NEXT_DATA__"[^>]*>(.+?)</script>', html, re.S)
+        if not m:
+            raise PlatformError(f"no episode data for podcast {source.podcast_id}")
+        podcast: dict[str, Any] = json.loads(m.group(1))["props"]["pageProps"]["podcast"]
+        items = []
+        for ep in (podcast.get("episodes") or [])[:limit]:
+            image = ep.get("image") or podcast.get("image") or {}
+            items.append(
+                Item(
+                    platform=self.name,
+                    source=source,
+                    id=ep["eid"],
+                    title=ep.get("title") or "",
+                    url=f"https://www.xiaoyuzhoufm.com/episode/{ep['eid']}",
+                    duration_seconds=int(ep.get("duration") or 0),
+                    published_at=(ep.get("pubDate") or "")[:10],
+                    cover_url=image.get("picUrl") or "",
+                )
+            )
+        return items
+
+
+def build_platforms(api_keys: dict[str, Any]) -> dict[str, Platform]:
+    bibigpt_key = str(api_keys.get("bibigpt") or "")
+    return {
+        "youtube": YouTube(),
+        "bilibili": Bilibili(bibigpt_key),
+        "xiaoyuzhou": Xiaoyuzhou(bibigpt_key),
+    }
@@ -0,0 +1,408 @@
+"""Chunked, concurrent LLM rewrite of ``transcript.md`` into ``rewritten.md``.
+
+Long transcripts are split into overlapping chunks on line and sentence
+boundaries (Chinese sentence ends need no trailing space), with a hard cut
+for text that has no boundaries at all.
+Each chunk is summarized into Chinese notes by its own LLM call, all chunks
+of all items in flight sharing one worker pool; a final merge call turns the
+notes into the article (核心观点总结, 关键洞察展开, 金句, 嘉宾信息, 结论与启发).
+Short transcripts skip the map step and are rewritten in one call.
+
+Every call is memoized by a hash of (model, prompt, input) in a small SQLite
+cache next to the archive, so a re-run after a crash or a merge-prompt change
+only redoes the calls whose inputs changed.  Failed chunks don't discard the
+ones that succeeded.
+
+The LLM sits behind :class:`LLMClient`; :class:`ChatClient` talks to any
+OpenAI-compatible ``/chat/completions`` endpoint configured under
+``api_keys.llm`` and :class:`StubClient` is an offline stand-in.
+
+Usage::
+
+    python -m pipeline.rewrite TRANSCRIPT [REWRITTEN] [--stub]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Protocol
+
+from . import vtt
+from .config import DEFAULT_CONFIG, load_config
+
+log = logging.getLogger("pipeline.rewrite")
+
+CACHE_NAME = "rewrite-cache.sqlite"
+CHUNK_CHARS = 12_000
+OVERLAP_CHARS = 800
+WORKERS = 6
+RETRIES = 2
+RETRY_DELAY = 1.0
+HTTP_TIMEOUT = 300
+
+# Zero-width split after a CJK sentence end (and its closer), never before a closer.
+CJK_END_RE = re.compile(r"(?:(?<=[。！？])|(?<=[。！？][”’」』）)]))(?![”’」』）)])")
+
+CHUNK_PROMPT = """\
+下面是一期访谈节目转录稿的第 {index}/{total} 段（与相邻段落有少量重叠）。
+请用中文提炼这一段的内容，输出：
+1. 要点：5-10 条，每条一句话，保留具体数字、案例和人名；
+2. 金句：0-3 句最有力量的原话，翻译成中文；
+3. 嘉宾：本段出现的嘉宾姓名及身份（没有则省略）。
+只输出提炼结果，不要寒暄。
+
+转录稿：
+{text}"""
+
+MERGE_PROMPT = """\
+下面是同一期访谈节目按顺序分段提炼的笔记。请据此写一篇中文深度文章，使用 Markdown，结构如下：
+
+# 标题（概括核心主题）
+
+## 核心观点总结
+（5 条编号要点，每条以 **粗体小标题** 开头）
+
+## 关键洞察展开
+（3-5 个 ### 小节，每节 1-2 段）
+
+## 金句
+（3-5 句编号金句，用引号括起）
+
+## 嘉宾信息
+（每位嘉宾一行：**姓名** - 身份）
+
+## 结论与启发
+
+去掉分段重叠造成的重复，不要提及“笔记”或“分段”。
+
+笔记：
+{text}"""
+
+SINGLE_PROMPT = MERGE_PROMPT.replace(
+    "下面是同一期访谈节目按顺序分段提炼的笔记。", "下面是一期访谈节目的完整转录稿。"
+).replace("去掉分段重叠造成的重复，不要提及“笔记”或“分段”。", "").replace("笔记：", "转录稿：")
+
+
+class RewriteError(RuntimeError):
+    pass
+
+
+@dataclass
+class Completion:
+    text: str
+    input_tokens: int
+    output_tokens: int
+
+
+class LLMClient(Protocol):
+    model: str
+
+    async def complete(self, prompt: str) -> Completion: ...
+
+
+class ChatClient:
+    """OpenAI-compatible ``/chat/completions`` client (urllib, run in a thread)."""
+
+    def __init__(self, base_url: str, api_key: str, model: str, max_tokens: int = 4096):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def from_config(cls, api_keys: dict[str, Any]) -> "ChatClient":
+        llm = api_keys.get("llm") or {}
+        if not llm.get("api_key"):
+            raise RewriteError("api_keys.llm is not configured")
+        return cls(llm.get("base_url", "https://api.openai.com/v1"), llm["api_key"], llm["model"])
+
+    async def complete(self, prompt: str) -> Completion:
+        body = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+        def _post() -> dict[str, Any]:
+            req = urllib.request.Request(
+                self.url,
+                data=json.dumps(body).encode(),
+                method="POST",
+                headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"},
+            )
+            with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as res:
+                return json.loads(res.read())
+
+        data = await asyncio.to_thread(_post)
+        usage = data.get("usage") or {}
+        return Completion(
+            text=data["choices"][0]["message"]["content"],
+            input_tokens=int(usage.get("prompt_tokens", 0)),
+            output_tokens=int(usage.get("completion_tokens", 0)),
+        )
+
+
+class StubClient:
+    """Offline stand-in: echoes the head of each input, optionally after a delay."""
+
+    model = "stub"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, prompt: str) -> Completion:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        text = prompt.rsplit("：\n", 1)[-1]
+        lines = [u.strip() for u in _units(text, 200) if u.strip()][:5]
+        out = "\n".join(f"- {line[:200]}" for line in lines)
+        return Completion(out, estimate_tokens(prompt), estimate_tokens(out))
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# -- chunking -----------------------------------------------------------------
+
+
+def _units(text: str, max_len: int) -> Iterator[str]:
+    """Lines and sentences of ``text``, each with its trailing separator.
+
+    Units longer than ``max_len`` (no punctuation, no newlines) are cut.
+    """
+    for line in text.strip().splitlines():
+        pieces = [p for p in vtt.SENTENCE_END_RE.split(line.strip()) if p]
+        for i, piece in enumerate(pieces):
+            sentences = [s for s in CJK_END_RE.split(piece) if s]
+            for j, sentence in enumerate(sentences):
+                sep = "" if j < len(sentences) - 1 else " " if i < len(pieces) - 1 else "\n"
+                for k in range(0, len(sentence), max_len):
+                    last = k + max_len >= len(sentence)
+                    yield sentence[k : k + max_len] + (sep if last else "")
+
+
+def split_chunks(text: str, size: int = CHUNK_CHARS, overlap: int = OVERLAP_CHARS) -> list[str]:
+    """Split on line/sentence boundaries into chunks of at most ``size`` characters.
+
+    Each chunk after the first starts with the last ``overlap`` characters'
+    worth of sentences from the previous one, so nothing said across a
+    boundary is lost.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    length = 0
+    for unit in _units(text, max(1, size // 4)):
+        if current and length + len(unit) > size:
+            chunks.append("".join(current).strip())
+            tail: list[str] = []
+            tail_len = 0
+            for prev in reversed(current):
+                # At least one sentence of overlap, unless it is huge
+                if tail_len + len(prev) > (overlap if tail else size // 2):
+                    break
+                tail.insert(0, prev)
+                tail_len += len(prev)
+            current, length = tail, tail_len
+        current.append(unit)
+        length += len(unit)
+    if current:
+        chunks.append("".join(current).strip())
+    return chunks
+
+
+# -- cache --------------------------------------------------------------------
+
+
+class CompletionCache:
+    """SQLite memo of completions keyed by sha256(model, prompt)."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+            " input_tokens INTEGER NOT NULL, output_tokens INTEGER NOT NULL,"
+            " created_at REAL NOT NULL) WITHOUT ROWID"
+        )
+
+    @classmethod
+    def for_archive(cls, archive_dir: Path) -> "CompletionCache":
+        return cls(archive_dir / CACHE_NAME)
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+    def get(self, key: str) -> Completion | None:
+        row = self.db.execute(
+            "SELECT text, input_tokens, output_tokens FROM completions WHERE key = ?", (key,)
+        ).fetchone()
+        return Completion(*row) if row else None
+
+    def put(self, key: str, completion: Completion) -> None:
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)",
+                (key, completion.text, completion.input_tokens, completion.output_tokens, time.time()),
+            )
+
+    def close(self) -> None:
+        self.db.close()
+
+
+# -- engine -------------------------------------------------------------------
+
+
+@dataclass
+class RewriteStats:
+    name: str
+    chunks: int = 0
+    calls: int = 0
+    cache_hits: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.calls if self.calls else 0.0
+
+    def line(self) -> str:
+        return (
+            f"{self.name:<40} chunks={self.chunks:<3} latency={self.latency:6.1f}s "
+            f"tokens={self.input_tokens}/{self.output_tokens} cache={self.hit_rate:4.0%}"
+        )
+
+
+@dataclass
+class RewriteEngine:
+    """Callable with the scheduler's ``Rewriter`` signature."""
+
+    client: LLMClient
+    cache: CompletionCache | None = None
+    workers: int = WORKERS
+    chunk_chars: int = CHUNK_CHARS
+    overlap_chars: int = OVERLAP_CHARS
+    stats: list[RewriteStats] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        # Shared by every item in flight, so the pool bounds total LLM calls.
+        self._pool = asyncio.Semaphore(self.workers)
+
+    async def _complete(self, prompt: str, stats: RewriteStats) -> str:
+        stats.calls += 1
+        key = CompletionCache.key(self.client.model, prompt)
+        hit = self.cache.get(key) if self.cache else None
+        if hit is not None:
+            stats.cache_hits += 1
+            return hit.text
+
+        for attempt in range(RETRIES + 1):
+            try:
+                async with self._pool:
+                    result = await self.client.complete(prompt)
+                break
+            except Exception as e:
+                if attempt == RETRIES:
+                    raise
+                log.warning("%s: LLM call failed (%s), retrying", stats.name, e)
+                await asyncio.sleep(RETRY_DELAY * 2**attempt)
+        stats.input_tokens += result.input_tokens
+        stats.output_tokens += result.output_tokens
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result.text
+
+    async def rewrite(self, transcript: str, name: str = "") -> tuple[str, RewriteStats]:
+        stats = RewriteStats(name)
+        started = time.monotonic()
+        chunks = split_chunks(transcript, self.chunk_chars, self.overlap_chars)
+        stats.chunks = len(chunks)
+        if len(chunks) <= 1:
+            article = await self._complete(SINGLE_PROMPT.format(text=transcript.strip()), stats)
+        else:
+            results = await asyncio.gather(
+                *(
+                    self._complete(CHUNK_PROMPT.format(index=i, total=len(chunks), text=chunk), stats)
+                    for i, chunk in enumerate(chunks, start=1)
+                ),
+                return_exceptions=True,
+            )
+            failed = [r for r in results if isinstance(r, BaseException)]
+            if failed:
+                raise RewriteError(f"{len(failed)}/{len(chunks)} chunks failed: {failed[0]}")
+            notes = "\n\n".join(f"### 第 {i} 段\n{r}" for i, r in enumerate(results, start=1))
+            article = await self._complete(MERGE_PROMPT.format(text=notes), stats)
+        stats.latency = time.monotonic() - started
+        return article.strip() + "\n", stats
+
+    async def __call__(self, transcript_path: Path, rewritten_path: Path) -> None:
+        name = transcript_path.parent.name
+        transcript = await asyncio.to_thread(transcript_path.read_text, encoding="utf-8")
+        article, stats = await self.rewrite(transcript, name)
+        tmp = rewritten_path.with_suffix(".md.tmp")
+        tmp.write_text(article, encoding="utf-8")
+        tmp.replace(rewritten_path)
+        self.stats.append(stats)
+        log.info("rewrite %s", stats.line())
+
+    def report(self) -> str:
+        if not self.stats:
+            return ""
+        calls = sum(s.calls for s in self.stats)
+        hits = sum(s.cache_hits for s in self.stats)
+        total = RewriteStats(
+            f"total ({len(self.stats)} items)",
+            chunks=sum(s.chunks for s in self.stats),
+            calls=calls,
+            cache_hits=hits,
+            input_tokens=sum(s.input_tokens for s in self.stats),
+            output_tokens=sum(s.output_tokens for s in self.stats),
+            latency=sum(s.latency for s in self.stats),
+        )
+        return "\n".join(s.line() for s in [*self.stats, total])
+
+
+def build_engine(api_keys: dict[str, Any], archive_dir: Path, stub: bool = False) -> RewriteEngine:
+    client: LLMClient = StubClient() if stub else ChatClient.from_config(api_keys)
+    return RewriteEngine(client, CompletionCache.for_archive(archive_dir))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rewrite a transcript.md into rewritten.md")
+    parser.add_argument("transcript", type=Path)
+    parser.add_argument("rewritten", type=Path, nargs="?", help="default: rewritten.md next to the transcript")
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    parser.add_argument("--stub", action="store_true", help="use the offline stub client")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = load_config(args.config)
+    engine = build_engine(config.api_keys, config.settings.output_dir, args.stub)
+    try:
+        asyncio.run(engine(args.transcript, args.rewritten or args.transcript.with_name("rewritten.md")))
+    finally:
+        if engine.cache is not None:
+            engine.cache.close()
+    print(engine.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
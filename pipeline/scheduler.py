@@ -0,0 +1,414 @@
+"""Concurrent multi-source ingestion scheduler.
+
+Fans out over every enabled source in ``config/sources.yaml``, filters the
+listings by ``min_duration`` before anything is downloaded, and pushes the
+surviving items through a bounded stage pipeline::
+
+    list -> captions -> transcript -> [rewrite] -> cover -> metadata
+
+Each stage has its own worker pool and a small bounded queue in front of it,
+so a slow stage (rewrite) applies back-pressure instead of blocking the fast
+ones, and memory stays proportional to the queue sizes.  Network-bound stages
+additionally share a per-platform concurrency cap and rate limit; cover
+downloads hit image CDNs rather than the platform itself and use a separate
+``cdn`` limiter.
+
+Usage::
+
+    python -m pipeline.scheduler [--limit N] [--only youtube,bilibili] [--rewrite]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from . import vtt
+from .archive import Item, build_metadata, item_dir, write_front_matter
+from .config import DEFAULT_CONFIG, Config, Source, load_config
+from .feishu import FeishuClient, sync_pending
+from .manifest import Manifest, restore_item
+from .platforms import Platform, build_platforms, http_get
+from .rewrite import build_engine
+
+log = logging.getLogger("pipeline.scheduler")
+
+StageFn = Callable[[Item, "Context"], Awaitable[None]]
+Rewriter = Callable[[Path, Path], Awaitable[None]]
+
+
+class RateLimiter:
+    """Caps concurrent calls and spaces call starts to ``rate_per_sec``."""
+
+    def __init__(self, concurrency: int, rate_per_sec: float):
+        self._sem = asyncio.Semaphore(max(1, int(concurrency)))
+        self._interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self) -> None:
+        await self._sem.acquire()
+        if self._interval:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_start - now
+                self._next_start = max(now, self._next_start) + self._interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def __aexit__(self, *exc: object) -> None:
+        self._sem.release()
+
+
+@dataclass
+class StageStats:
+    name: str
+    done: int = 0
+    failed: int = 0
+    busy: float = 0.0
+    first_start: float | None = None
+    last_end: float | None = None
+
+    def record(self, started: float, ok: bool) -> None:
+        ended = time.monotonic()
+        self.busy += ended - started
+        if self.first_start is None or started < self.first_start:
+            self.first_start = started
+        self.last_end = ended
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+
+    @property
+    def wall(self) -> float:
+        if self.first_start is None or self.last_end is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    def line(self) -> str:
+        rate = self.done / self.wall if self.wall else 0.0
+        avg = self.busy / max(1, self.done + self.failed)
+        return (
+            f"{self.name:<11} done={self.done:<4} failed={self.failed:<3} "
+            f"wall={self.wall:7.1f}s avg={avg:6.2f}s throughput={rate:6.2f}/s"
+        )
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: StageFn
+    workers: int = 2
+    # Network stages run under the item's platform RateLimiter, or under
+    # ``limiter`` when set.
+    network: bool = False
+    limiter: str | None = None
+    # Checked before any limiter is taken; items it rejects pass straight through.
+    when: Callable[[Item, "Context"], bool] | None = None
+
+
+@dataclass
+class Context:
+    config: Config
+    platforms: dict[str, Platform]
+    limiters: dict[str, RateLimiter]
+    stats: dict[str, StageStats] = field(default_factory=dict)
+
+
+# -- stages -----------------------------------------------------------------
+
+
+async def fetch_captions(item: Item, ctx: Context) -> None:
+    assert item.dir is not None
+    item.dir.mkdir(parents=True, exist_ok=True)
+    item.captions_path = await ctx.platforms[item.platform].fetch_captions(item, item.dir)
+
+
+def _write_transcript(captions: Path, dst: Path) -> None:
+    if captions.suffix == ".vtt":
+        vtt.convert(captions, dst)
+        return
+    cues = json.loads(captions.read_text(encoding="utf-8"))
+    with open(dst, "w", encoding="utf-8") as f:
+        for cue in cues:
+            if cue["text"]:
+                f.write(f"{vtt.format_timestamp(cue['start'])} {cue['text']}\n\n")
+
+
+async def clean_transcript(item: Item, ctx: Context) -> None:
+    assert item.dir is not None and item.captions_path is not None
+    await asyncio.to_thread(_write_transcript, item.captions_path, item.dir / "transcript.md")
+    item.captions_path.unlink(missing_ok=True)
+
+
+def rewrite_stage(rewriter: Rewriter) -> StageFn:
+    async def rewrite(item: Item, ctx: Context) -> None:
+        assert item.dir is not None
+        await rewriter(item.dir / "transcript.md", item.dir / "rewritten.md")
+
+    return rewrite
+
+
+def wants_cover(item: Item, ctx: Context) -> bool:
+    return ctx.config.settings.download_covers and bool(item.cover_url)
+
+
+async def download_cover(item: Item, ctx: Context) -> None:
+    assert item.dir is not None and item.cover_url
+    data = await http_get(item.cover_url)
+    ext = ".webp" if data[8:12] == b"WEBP" else ".png" if data[:4] == b"\x89PNG" else ".jpg"
+    (item.dir / f"cover{ext}").write_bytes(data)
+
+
+async def write_metadata(item: Item, ctx: Context) -> None:
+    assert item.dir is not None
+    write_front_matter(item.dir / "metadata.md", build_metadata(item))
+
+
+def default_stages(rewriter: Rewriter | None = None) -> list[Stage]:
+    stages = [
+        Stage("captions", fetch_captions, workers=6, network=True),
+        Stage("transcript", clean_transcript, workers=2),
+    ]
+    if rewriter is not None:
+        stages.append(Stage("rewrite", rewrite_stage(rewriter), workers=4))
+    stages += [
+        Stage("cover", download_cover, workers=4, network=True, limiter="cdn", when=wants_cover),
+        Stage("metadata", write_metadata, workers=1),
+    ]
+    return stages
+
+
+# -- scheduler --------------------------------------------------------------
+
+
+class Scheduler:
+    def __init__(
+        self,
+        config: Config,
+        stages: list[Stage] | None = None,
+        platforms: dict[str, Platform] | None = None,
+        batch_limit: int | None = None,
+        queue_size: int = 4,
+        manifest: Manifest | None = None,
+    ):
+        self.config = config
+        self.manifest = manifest
+        self._seen: set[str] = set()
+        self.stages = stages if stages is not None else default_stages()
+        self.batch_limit = batch_limit or config.settings.default_batch_limit
+        self.queue_size = queue_size
+        self.ctx = Context(
+            config=config,
+            platforms=platforms or build_platforms(config.api_keys),
+            limiters={
+                name: RateLimiter(int(lim["concurrency"]), float(lim["rate_per_sec"]))
+                for name, lim in config.settings.platform_limits.items()
+            },
+        )
+        for name in ["list", *(s.name for s in self.stages)]:
+            self.ctx.stats[name] = StageStats(name)
+
+    def accept(self, item: Item) -> bool:
+        """``min_duration`` filter, applied to listings before any download.
+
+        Items the listing gave no duration for pass; they are probed (see
+        :meth:`_probe_durations`) and filtered again before being queued.
+        """
+        if not item.duration_seconds:
+            return True
+        return item.duration_seconds >= item.source.min_duration * 60
+
+    async def _probe_durations(self, platform: Platform, items: list[Item]) -> list[Item]:
+        """Fill in missing durations with a metadata-only call per item.
+
+        Items whose probe fails are dropped for this run rather than sent on
+        to a (possibly paid) captions call.
+        """
+        probe = getattr(platform, "probe_duration", None)
+        if probe is None:
+            return items
+
+        async def one(item: Item) -> Item | None:
+            if item.duration_seconds:
+                return item
+            try:
+                async with self.ctx.limiters[item.platform]:
+                    item.duration_seconds = await probe(item)
+            except Exception as e:
+                log.warning("%s duration probe failed, skipping: %s", item.key, e)
+                return None
+            return item
+
+        probed = await asyncio.gather(*(one(i) for i in items))
+        return [i for i in probed if i is not None and self.accept(i)]
+
+    async def _list_source(self, source: Source, out: asyncio.Queue[Item | None]) -> None:
+        stats = self.ctx.stats["list"]
+        platform = self.ctx.platforms.get(source.platform)
+        if platform is None:
+            log.warning("no adapter for platform %s (%s)", source.platform, source.name)
+            return
+        started = time.monotonic()
+        try:
+            async with self.ctx.limiters[source.platform]:
+                items = await platform.list_items(source, self.batch_limit)
+        except Exception as e:
+            stats.record(started, ok=False)
+            log.error("list %s/%s failed: %s", source.platform, source.name, e)
+            return
+        stats.record(started, ok=True)
+        fresh = [i for i in items if self.accept(i) and self.prepare(i)]
+        todo = await self._probe_durations(platform, fresh)
+        log.info(
+            "%s/%s: %d listed, %d new or unfinished, %d to process after min_duration",
+            source.platform, source.name, len(items), len(fresh), len(todo),
+        )
+        for item in todo:
+            await out.put(item)
+
+    def prepare(self, item: Item) -> bool:
+        """Assign the item's directory; False if there is nothing left to do.
+
+        Finished items are skipped with a single manifest lookup; half-finished
+        ones resume in their existing directory with completed stages marked.
+        """
+        if item.key in self._seen:
+            return False
+        self._seen.add(item.key)
+        entry = self.manifest.get(item.platform, item.id) if self.manifest else None
+        if entry is None:
+            item.dir = item_dir(self.config.settings.output_dir, item)
+            return True
+        if entry.complete:
+            return False
+        item.dir = entry.dir
+        restore_item(item, entry.item)
+        item.completed = set(entry.stages)
+        if "captions" in item.completed and "transcript" not in item.completed:
+            leftovers = sorted(item.dir.glob("captions*.vtt")) + sorted(item.dir.glob("captions.json"))
+            if leftovers:
+                item.captions_path = leftovers[0]
+            else:
+                item.completed.discard("captions")
+        return True
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        inq: asyncio.Queue[Item | None],
+        outq: asyncio.Queue[Item | None] | None,
+    ) -> None:
+        stats = self.ctx.stats[stage.name]
+        while True:
+            item = await inq.get()
+            if item is None:
+                return
+            if stage.name in item.completed:
+                if outq is not None:
+                    await outq.put(item)
+                continue
+            if stage.when is not None and not stage.when(item, self.ctx):
+                self.on_success(item, stage)
+                if outq is not None:
+                    await outq.put(item)
+                continue
+            started = time.monotonic()
+            try:
+                if stage.network:
+                    async with self.ctx.limiters[stage.limiter or item.platform]:
+                        await stage.fn(item, self.ctx)
+                else:
+                    await stage.fn(item, self.ctx)
+            except Exception as e:
+                stats.record(started, ok=False)
+                self.on_failure(item, stage, e)
+                continue
+            stats.record(started, ok=True)
+            self.on_success(item, stage)
+            if outq is not None:
+                await outq.put(item)
+
+    def on_success(self, item: Item, stage: Stage) -> None:
+        log.debug("%s %s ok", item.key, stage.name)
+        if self.manifest is not None:
+            self.manifest.mark_stage(item, stage.name)
+
+    def on_failure(self, item: Item, stage: Stage, error: Exception) -> None:
+        log.error("%s %s failed: %s", item.key, stage.name, error)
+        if self.manifest is not None:
+            self.manifest.mark_failed(item, stage.name, error)
+
+    async def run(self, sources: list[Source] | None = None) -> dict[str, StageStats]:
+        sources = sources if sources is not None else self.config.enabled_sources()
+        queues: list[asyncio.Queue[Item | None]] = [
+            asyncio.Queue(maxsize=self.queue_size * s.workers) for s in self.stages
+        ]
+
+        async def feed() -> None:
+            await asyncio.gather(*(self._list_source(s, queues[0]) for s in sources))
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(None)
+
+        async def drive(i: int) -> None:
+            stage = self.stages[i]
+            outq = queues[i + 1] if i + 1 < len(self.stages) else None
+            await asyncio.gather(*(self._run_stage(stage, queues[i], outq) for _ in range(stage.workers)))
+            if outq is not None:
+                for _ in range(self.stages[i + 1].workers):
+                    await outq.put(None)
+
+        await asyncio.gather(feed(), *(drive(i) for i in range(len(self.stages))))
+        return self.ctx.stats
+
+    def report(self) -> str:
+        return "\n".join(s.line() for s in self.ctx.stats.values())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Refresh all enabled sources concurrently")
+    parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG)
+    parser.add_argument("--limit", type=int, help="items per source (default: settings.default_batch_limit)")
+    parser.add_argument("--only", help="comma-separated platforms to include")
+    parser.add_argument("--rewrite", action="store_true", help="include the LLM rewrite stage")
+    parser.add_argument("--stub-llm", action="store_true", help="rewrite with the offline stub client")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    config = load_config(args.config)
+    sources = config.enabled_sources()
+    if args.only:
+        wanted = set(args.only.split(","))
+        sources = [s for s in sources if s.platform in wanted]
+
+    manifest = Manifest.for_archive(config.settings.output_dir)
+    engine = build_engine(config.api_keys, config.settings.output_dir, args.stub_llm) if args.rewrite else None
+    scheduler = Scheduler(config, default_stages(engine), batch_limit=args.limit, manifest=manifest)
+    started = time.monotonic()
+    try:
+        asyncio.run(scheduler.run(sources))
+        if config.settings.auto_sync_feishu:
+            created, updated = sync_pending(manifest, FeishuClient.from_config(config.api_keys))
+            print(f"✓ feishu: {created} created, {updated} updated")
+    finally:
+        manifest.close()
+        if engine is not None and engine.cache is not None:
+            engine.cache.close()
+    print(scheduler.report())
+    if engine is not None and engine.stats:
+        print(engine.report())
+    print(f"✓ {len(sources)} sources in {time.monotonic() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Streaming WebVTT -> ``transcript.md`` cleaner.
+
+YouTube auto-captions are "rolling": every cue repeats the previous line before
+adding a new one, and each new line carries ``<00:00:00.240><c> word</c>``
+word-timing tags.  A two-hour episode is ~1 MB of VTT for ~120 KB of text.
+
+This module reads the VTT one cue at a time, strips the timing tags, drops the
+rolled-over lines and re-flows the remaining text into sentences, so the
+transcript is produced in a single pass with memory bounded by the longest
+sentence rather than by the episode length.
+
+Usage::
+
+    python -m pipeline.vtt temp.en.vtt -o transcript.md [--timestamps]
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import re
+import sys
+from collections import deque
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+TIMING_RE = re.compile(r"^(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})\s+-->\s+")
+TAG_RE = re.compile(r"<[^>]*>")
+# Only the whitespace is consumed, so closing quotes/brackets stay with the
+# sentence.  Whitespace after a terminator or a closer, but not after a closer
+# that doesn't itself follow a terminator; two single-char lookbehinds are
+# much cheaper than an alternation of lookbehinds.
+SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？\"')\]”’])(?<![^.!?。！？][\"')\]”’])\s+")
+SENTENCE_TAIL_RE = re.compile(r"[.!?。！？][\"')\]”’]?$")
+
+# Captions without punctuation would otherwise grow a sentence forever.
+MAX_SENTENCE_CHARS = 600
+# Rolling captions only ever repeat the line(s) directly above.
+DEDUP_WINDOW = 2
+
+
+def parse_timestamp(match: re.Match[str]) -> float:
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds the way archived transcripts do: ``[0:05]`` / ``[1:02:03]``."""
+    total = int(seconds)
+    h, rem = divmod(total, 3600)
+    m, s = divmod(rem, 60)
+    if h:
+        return f"[{h}:{m:02d}:{s:02d}]"
+    return f"[{m}:{s:02d}]"
+
+
+def clean_line(line: str) -> str:
+    return " ".join(html.unescape(TAG_RE.sub("", line)).split())
+
+
+def iter_cues(lines: Iterable[str]) -> Iterator[tuple[float, list[str]]]:
+    """Yield ``(start_seconds, text_lines)`` for every cue in a VTT stream."""
+    start: float | None = None
+    text: list[str] = []
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        match = TIMING_RE.match(line)
+        if match:
+            if start is not None and text:
+                yield start, text
+            start, text = parse_timestamp(match), []
+            continue
+        if start is None:
+            # WEBVTT header, Kind:/Language:, NOTE and STYLE blocks
+            continue
+        if not line:
+            if text:
+                yield start, text
+            start, text = None, []
+            continue
+        text.append(line)
+    if start is not None and text:
+        yield start, text
+
+
+def iter_caption_lines(
+    cues: Iterable[tuple[float, list[str]]], window: int = DEDUP_WINDOW
+) -> Iterator[tuple[float, str]]:
+    """Collapse rolling-caption repeats, yielding each spoken line once."""
+    recent: deque[str] = deque(maxlen=window)
+    for start, text in cues:
+        for raw in text:
+            line = clean_line(raw)
+            if not line or line in recent:
+                continue
+            recent.append(line)
+            yield start, line
+
+
+def iter_sentences(
+    caption_lines: Iterable[tuple[float, str]],
+    max_chars: int = MAX_SENTENCE_CHARS,
+) -> Iterator[tuple[float, str]]:
+    """Re-flow caption lines into ``(start_seconds, sentence)`` pairs."""
+    buf = ""
+    buf_start = 0.0
+    for start, line in caption_lines:
+        if not buf:
+            buf_start = start
+            buf = line
+        else:
+            buf = f"{buf} {line}"
+        pieces = SENTENCE_END_RE.split(buf)
+        for piece in pieces[:-1]:
+            yield buf_start, piece.strip()
+            buf_start = start
+        buf = pieces[-1]
+        if SENTENCE_TAIL_RE.search(buf) or len(buf) >= max_chars:
+            yield buf_start, buf.strip()
+            buf = ""
+    if buf.strip():
+        yield buf_start, buf.strip()
+
+
+def write_transcript(src: IO[str], dst: IO[str], timestamps: bool = False) -> int:
+    """Stream ``src`` VTT into ``dst`` transcript text. Returns sentence count."""
+    count = 0
+    for start, sentence in iter_sentences(iter_caption_lines(iter_cues(src))):
+        if timestamps:
+            dst.write(f"{format_timestamp(start)} {sentence}\n\n")
+        else:
+            dst.write(sentence if count == 0 else f" {sentence}")
+        count += 1
+    if count and not timestamps:
+        dst.write("\n")
+    return count
+
+
+def convert(src_path: Path, dst_path: Path, timestamps: bool = False) -> int:
+    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dst_path.with_suffix(dst_path.suffix + ".tmp")
+    with open(src_path, encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as dst:
+        count = write_transcript(src, dst, timestamps=timestamps)
+    tmp_path.replace(dst_path)
+    return count
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a WebVTT caption file into transcript.md")
+    parser.add_argument("vtt", type=Path)
+    parser.add_argument("-o", "--output", type=Path, help="defaults to transcript.md next to the VTT")
+    parser.add_argument("--timestamps", action="store_true", help="prefix each sentence with [m:ss]")
+    args = parser.parse_args(argv)
+
+    output = args.output or args.vtt.with_name("transcript.md")
+    count = convert(args.vtt, output, timestamps=args.timestamps)
+    print(f"✓ {count} sentences -> {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,14 @@
 import type { NextConfig } from "next";
 
 const nextConfig: NextConfig = {
-  /* config options here */
+  images: {
+    // Covers are served by /api/cover and resized/re-encoded by next/image
+    localPatterns: [{ pathname: "/api/cover" }],
+    formats: ["image/webp"],
+    deviceSizes: [640, 960, 1280, 1920],
+    imageSizes: [320, 480],
+    minimumCacheTTL: 31536000,
+  },
 };
 
 export default nextConfig;
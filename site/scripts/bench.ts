@@ -0,0 +1,128 @@
+// Benchmarks the site's real article rendering and cover cache on a scratch
+// archive built by `python -m pipeline.bench`, which runs this script and
+// reads the JSON it prints on stdout.
+//
+//   npm run bench -- <archive-dir> [repeat]
+//
+// Needs `npm install` and `npx prisma generate` (cover-cache imports the
+// Prisma client, although disk and memory hits never query it).
+
+import { createHash } from "crypto";
+import { promises as fs } from "fs";
+import os from "os";
+import path from "path";
+import { renderToStaticMarkup } from "react-dom/server";
+import { compileArticle } from "../src/lib/article-render";
+
+interface StageResult {
+  items: number;
+  seconds: number;
+  bytes: number;
+  // Heap growth over one untimed run
+  peak_mb: number;
+}
+
+const COVER_NAMES = ["cover.jpg", "cover.webp", "cover.png"];
+
+async function measure(items: number, repeat: number, run: (r: number) => Promise<number>): Promise<StageResult> {
+  let best = Infinity;
+  let bytes = 0;
+  for (let r = 0; r < repeat; r++) {
+    const started = performance.now();
+    bytes = await run(r);
+    best = Math.min(best, (performance.now() - started) / 1000);
+  }
+  (globalThis as { gc?: () => void }).gc?.();
+  const before = process.memoryUsage().heapUsed;
+  await run(repeat);
+  const after = process.memoryUsage().heapUsed;
+  return { items, seconds: best, bytes, peak_mb: Math.max(0, after - before) / 1e6 };
+}
+
+async function findItems(archive: string): Promise<string[]> {
+  const dirs: string[] = [];
+  for (const day of await fs.readdir(archive)) {
+    const dayDir = path.join(archive, day);
+    if (!(await fs.stat(dayDir)).isDirectory()) continue;
+    for (const name of await fs.readdir(dayDir)) dirs.push(path.join(dayDir, name));
+  }
+  return dirs.sort();
+}
+
+async function findCover(dir: string): Promise<string | null> {
+  for (const name of COVER_NAMES) {
+    const file = path.join(dir, name);
+    if (await fs.stat(file).then(() => true, () => false)) return file;
+  }
+  return null;
+}
+
+function render(body: string): number {
+  const { content } = compileArticle(body);
+  return renderToStaticMarkup(content).length;
+}
+
+async function main() {
+  const [archive, repeatArg] = process.argv.slice(2);
+  if (!archive) throw new Error("usage: bench.ts <archive-dir> [repeat]");
+  const repeat = Number(repeatArg ?? 3);
+  const dirs = await findItems(archive);
+  const bodies = await Promise.all(dirs.map((d) => fs.readFile(path.join(d, "rewritten.md"), "utf8")));
+  const bodyBytes = bodies.reduce((a, b) => a + Buffer.byteLength(b), 0);
+
+  const stages: Record<string, StageResult> = {};
+
+  // A per-run marker changes the content hash, so every body compiles from scratch.
+  stages["site-render-cold"] = await measure(dirs.length, repeat, async (r) => {
+    bodies.forEach((body, i) => render(`${body}\n\n<!-- bench ${r} ${i} -->\n`));
+    return bodyBytes;
+  });
+  bodies.forEach(render);
+  stages["site-render-cached"] = await measure(dirs.length, repeat, async () => {
+    bodies.forEach(render);
+    return bodyBytes;
+  });
+
+  // Seed the cover cache's disk tier in its own format, one token set per run
+  // so each run misses the in-memory tier.
+  const cacheDir = await fs.mkdtemp(path.join(os.tmpdir(), "cover-bench-"));
+  process.env.COVER_CACHE_DIR = cacheDir;
+  await fs.mkdir(path.join(cacheDir, "blobs"), { recursive: true });
+  await fs.mkdir(path.join(cacheDir, "tokens"), { recursive: true });
+  const covers: { file: string; bytes: number; hash: string; ct: string }[] = [];
+  for (const dir of dirs) {
+    const file = await findCover(dir);
+    if (!file) continue;
+    const buf = await fs.readFile(file);
+    const hash = createHash("sha256").update(buf).digest("hex");
+    await fs.writeFile(path.join(cacheDir, "blobs", hash), buf);
+    const ct = file.endsWith(".webp") ? "image/webp" : file.endsWith(".png") ? "image/png" : "image/jpeg";
+    covers.push({ file, bytes: buf.byteLength, hash, ct });
+  }
+  for (let r = 0; r <= repeat; r++) {
+    await Promise.all(
+      covers.map((c, i) => fs.writeFile(path.join(cacheDir, "tokens", `bench_${r}_${i}`), `${c.hash} ${c.ct}`))
+    );
+  }
+  const coverBytes = covers.reduce((a, c) => a + c.bytes, 0);
+
+  // Imported only now: the cache directory is read at module load.
+  const { getCover } = await import("../src/lib/cover-cache");
+  const fetchAll = async (r: number) => {
+    for (let i = 0; i < covers.length; i++) {
+      if (!(await getCover(`bench_${r}_${i}`))) throw new Error(`cover bench_${r}_${i} missed`);
+    }
+    return coverBytes;
+  };
+  stages["site-cover-disk"] = await measure(covers.length, repeat, fetchAll);
+  stages["site-cover-memory"] = await measure(covers.length, repeat, () => fetchAll(0));
+
+  await fs.rm(cacheDir, { recursive: true, force: true });
+  process.stdout.write(JSON.stringify({ stages }) + "\n");
+  process.exit(0);
+}
+
+main().catch((e) => {
+  console.error(e);
+  process.exit(1);
+});
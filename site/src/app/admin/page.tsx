@@ -1,5 +1,5 @@
 import { auth } from "@/lib/auth";
-import { prisma } from "@/lib/db";
+import { viewBuffer } from "@/lib/view-buffer";
 import { redirect } from "next/navigation";
 import Link from "next/link";
 
@@ -9,11 +9,13 @@ export default async function AdminPage() {
   if (!session?.user) redirect("/login");
   if ((session.user as any).role !== "ADMIN") redirect("/");
 
-  const views = await prisma.viewCount.findMany({
-    orderBy: { count: "desc" },
-  });
+  const [views, daily] = await Promise.all([
+    viewBuffer.getSnapshot(),
+    viewBuffer.getDailyTotals(14),
+  ]);
 
   const totalViews = views.reduce((sum, v) => sum + v.count, 0);
+  const dailyMax = Math.max(1, ...daily.map((d) => d.count));
 
   return (
     <main className="min-h-screen" style={{ background: "var(--paper)" }}>
@@ -57,6 +59,22 @@ export default async function AdminPage() {
           </div>
         </div>
 
+        {/* Trend */}
+        <div className="paper-card mb-10" style={{ padding: "1.25rem 1.75rem" }}>
+          <p className="font-mono" style={{ fontSize: "0.6rem", color: "var(--muted)", letterSpacing: "0.1em", textTransform: "uppercase", marginBottom: 12 }}>近 14 天浏览</p>
+          <div className="flex items-end gap-2" style={{ height: 80 }}>
+            {daily.map((d) => (
+              <div key={d.day} className="flex-1 flex flex-col items-center justify-end" style={{ height: "100%" }} title={`${d.day} · ${d.count}`}>
+                <div style={{ width: "100%", height: `${(d.count / dailyMax) * 100}%`, minHeight: d.count > 0 ? 2 : 0, background: "var(--gold)", borderRadius: "2px 2px 0 0" }} />
+              </div>
+            ))}
+          </div>
+          <div className="flex justify-between mt-2">
+            <span className="font-mono" style={{ fontSize: "0.55rem", color: "var(--muted)" }}>{daily[0]?.day.slice(5)}</span>
+            <span className="font-mono" style={{ fontSize: "0.55rem", color: "var(--muted)" }}>{daily[daily.length - 1]?.day.slice(5)}</span>
+          </div>
+        </div>
+
         {/* Table */}
         {views.length === 0 ? (
           <p className="font-mono" style={{ fontSize: "0.75rem", color: "var(--muted)", letterSpacing: "0.06em" }}>暂无浏览数据</p>
@@ -1,32 +1,28 @@
 import { NextRequest, NextResponse } from "next/server";
-import { getCoverUrl } from "@/lib/feishu";
+import { getCover } from "@/lib/cover-cache";
 
-const cache = new Map<string, { buf: ArrayBuffer; ct: string; expiresAt: number }>();
+// Feishu file tokens are alphanumeric; anything else could escape the cache dir.
+const TOKEN_RE = /^[A-Za-z0-9_-]+$/;
 
 export async function GET(req: NextRequest) {
   const token = req.nextUrl.searchParams.get("token");
   if (!token) return NextResponse.json({ error: "missing token" }, { status: 400 });
-
-  const cached = cache.get(token);
-  if (cached && Date.now() < cached.expiresAt) {
-    return new NextResponse(cached.buf, {
-      headers: { "Content-Type": cached.ct, "Cache-Control": "public, max-age=1500" },
-    });
-  }
+  if (!TOKEN_RE.test(token)) return NextResponse.json({ error: "invalid token" }, { status: 400 });
 
   try {
-    const url = await getCoverUrl(token);
-    if (!url) return NextResponse.json({ error: "not found" }, { status: 404 });
-
-    const imgRes = await fetch(url);
-    if (!imgRes.ok) return NextResponse.json({ error: "fetch failed" }, { status: 502 });
-
-    const buf = await imgRes.arrayBuffer();
-    const ct = imgRes.headers.get("content-type") || "image/jpeg";
-    cache.set(token, { buf, ct, expiresAt: Date.now() + 25 * 60 * 1000 });
+    const cover = await getCover(token);
+    if (!cover) return NextResponse.json({ error: "not found" }, { status: 404 });
 
-    return new NextResponse(buf, {
-      headers: { "Content-Type": ct, "Cache-Control": "public, max-age=1500" },
+    // Feishu file tokens never change content, so responses are immutable.
+    const headers = {
+      ETag: cover.etag,
+      "Cache-Control": "public, max-age=31536000, immutable",
+    };
+    if (req.headers.get("if-none-match") === cover.etag) {
+      return new NextResponse(null, { status: 304, headers });
+    }
+    return new NextResponse(cover.buf, {
+      headers: { ...headers, "Content-Type": cover.ct },
     });
   } catch {
     return NextResponse.json({ error: "failed" }, { status: 500 });
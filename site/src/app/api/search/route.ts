@@ -0,0 +1,19 @@
+import { NextRequest, NextResponse } from "next/server";
+import { search } from "@/lib/search";
+
+const MAX_PAGE_SIZE = 50;
+
+export async function GET(req: NextRequest) {
+  const params = req.nextUrl.searchParams;
+  const q = (params.get("q") || "").slice(0, 100);
+  const tag = params.get("tag") || null;
+  const page = Math.max(1, Number(params.get("page")) || 1);
+  const pageSize = Math.min(MAX_PAGE_SIZE, Math.max(1, Number(params.get("pageSize")) || 24));
+
+  try {
+    return NextResponse.json(await search(q, { tag, page, pageSize }));
+  } catch (e) {
+    console.warn(`Search failed: ${e}`);
+    return NextResponse.json({ error: "search failed" }, { status: 500 });
+  }
+}
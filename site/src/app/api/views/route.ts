@@ -1,5 +1,5 @@
 import { NextRequest, NextResponse } from "next/server";
-import { prisma } from "@/lib/db";
+import { viewBuffer } from "@/lib/view-buffer";
 
 export async function POST(req: NextRequest) {
   const { articleId, title } = await req.json();
@@ -7,18 +7,12 @@ export async function POST(req: NextRequest) {
     return NextResponse.json({ error: "missing articleId" }, { status: 400 });
   }
 
-  await prisma.viewCount.upsert({
-    where: { articleId },
-    update: { count: { increment: 1 }, title },
-    create: { articleId, title, count: 1 },
-  });
+  viewBuffer.record(articleId, title);
 
   return NextResponse.json({ success: true });
 }
 
 export async function GET() {
-  const views = await prisma.viewCount.findMany({
-    orderBy: { count: "desc" },
-  });
+  const views = await viewBuffer.getSnapshot();
   return NextResponse.json(views);
 }
@@ -1,16 +1,16 @@
-import { getRecordWithCover, getRecords } from "@/lib/feishu";
-import { MarkdownContent } from "@/lib/markdown";
+import { getRecord, getRecordIds } from "@/lib/feishu";
+import { compileArticle } from "@/lib/article-render";
 import { TableOfContents } from "@/lib/toc";
-import { extractToc } from "@/lib/toc-utils";
 import { ViewTracker } from "@/lib/view-tracker";
 import { AuthNav } from "@/lib/auth-nav";
 import Link from "next/link";
+import Image from "next/image";
 
 export const revalidate = 3600;
 
 export async function generateStaticParams() {
-  const records = await getRecords();
-  return records.map((r) => ({ id: r.id }));
+  const ids = await getRecordIds();
+  return ids.map((id) => ({ id }));
 }
 
 function formatDate(ts: number): string {
@@ -36,23 +36,15 @@ function platformLabel(p: string): string {
   return map[p] || p;
 }
 
-function stripQuotesSection(body: string): string {
-  let result = body.replace(/\n## 金句[^\n]*\n[\s\S]*?(?=\n## |\n# |$)/, "");
-  result = result.replace(/^金句精选\n[\s\S]*?(?=\n---\n)/, "");
-  result = result.replace(/\n金句精选\n[\s\S]*?(?=\n---\n)/, "");
-  return result;
-}
-
 export default async function ContentPage({
   params,
 }: {
   params: Promise<{ id: string }>;
 }) {
   const { id } = await params;
-  const record = await getRecordWithCover(id);
+  const record = await getRecord(id);
   const guests = parseGuests(record.guests);
-  const bodyWithoutQuotes = stripQuotesSection(record.body);
-  const tocItems = extractToc(bodyWithoutQuotes);
+  const { toc: tocItems, content } = compileArticle(record.body);
 
   return (
     <main className="min-h-screen" style={{ background: "var(--paper)" }}>
@@ -91,10 +83,13 @@ export default async function ContentPage({
         >
           {record.coverFileToken ? (
             <>
-              <img
+              <Image
                 alt={record.title}
-              src={`/api/cover?token=${record.coverFileToken}`}
-                className="w-full h-full object-cover"
+                src={`/api/cover?token=${record.coverFileToken}`}
+                fill
+                sizes="(min-width: 1536px) 1536px, 100vw"
+                priority
+                className="object-cover"
                 style={{ opacity: 0.88 }}
               />
               <div
@@ -220,7 +215,7 @@ export default async function ContentPage({
 
             {/* Article body */}
             <div style={{ borderTop: "2px solid var(--ink)", paddingTop: "2rem" }}>
-              <MarkdownContent content={bodyWithoutQuotes} />
+              {content}
             </div>
           </div>
         </div>
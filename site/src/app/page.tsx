@@ -1,29 +1,19 @@
-import { getRecordsWithCovers } from "@/lib/feishu";
+import { publishedTags, search } from "@/lib/search";
 import { ContentGrid } from "@/lib/content-grid";
 import { AuthNav } from "@/lib/auth-nav";
 
 export const revalidate = 3600;
 
+// Records rendered up front; the grid pages the rest in from /api/search
+const FIRST_PAGE = 24;
+
 export default async function HomePage() {
-  const records = await getRecordsWithCovers();
-  const published = records
-    .filter((r) => r.status === "已发布")
-    .sort((a, b) => b.publishDate - a.publishDate);
+  // Newest published records; the same query /api/search serves for later pages
+  const [firstPage, allTags] = await Promise.all([search("", { page: 1, pageSize: FIRST_PAGE }), publishedTags()]);
 
   const today = new Date();
   const issueNo = `Issue ${String(today.getFullYear()).slice(2)}·${String(today.getMonth() + 1).padStart(2, "0")}`;
 
-  // Serialize only what the client component needs
-  const clientRecords = published.map((r) => ({
-    id: r.id,
-    title: r.title,
-    guests: r.guests,
-    platform: r.platform,
-    publishDate: r.publishDate,
-    coverFileToken: r.coverFileToken,
-    tags: r.tags,
-  }));
-
   return (
     <main className="min-h-screen" style={{ background: "var(--paper)" }}>
 
@@ -40,7 +30,7 @@ export default async function HomePage() {
           </span>
           <div className="flex items-center gap-3">
             <span className="font-mono" style={{ fontSize: "0.6rem", letterSpacing: "0.12em", textTransform: "uppercase", color: "var(--muted)" }}>
-              {published.length} 篇精选
+              {firstPage.total} 篇精选
             </span>
             <AuthNav />
           </div>
@@ -78,7 +68,7 @@ export default async function HomePage() {
           <div className="flex-1" style={{ height: 1, background: "var(--border)" }} />
         </div>
 
-        <ContentGrid records={clientRecords} />
+        <ContentGrid records={firstPage.hits} total={firstPage.total} tags={allTags} />
 
       </div>
 
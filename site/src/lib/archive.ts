@@ -0,0 +1,57 @@
+import { promises as fs } from "fs";
+import path from "path";
+
+// Read-only view of the ingestion archive:
+// content-archive/<date>/<platform>_<source>_<video id>/{cover.*,transcript.md,...}
+
+const ARCHIVE_DIR = process.env.CONTENT_ARCHIVE_DIR ?? path.join(process.cwd(), "../content-archive");
+const ARCHIVE_INDEX_TTL_MS = 10 * 60 * 1000;
+
+export interface ArchiveItem {
+  dir: string;
+  cover: string | null;
+  transcript: string | null;
+}
+
+let archiveIndex: { map: Map<string, ArchiveItem>; builtAt: number } | null = null;
+
+async function getArchiveIndex(): Promise<Map<string, ArchiveItem>> {
+  if (archiveIndex && Date.now() - archiveIndex.builtAt < ARCHIVE_INDEX_TTL_MS) {
+    return archiveIndex.map;
+  }
+  const map = new Map<string, ArchiveItem>();
+  const days = await fs.readdir(ARCHIVE_DIR).catch(() => [] as string[]);
+  for (const day of days) {
+    const items = await fs.readdir(path.join(ARCHIVE_DIR, day)).catch(() => [] as string[]);
+    for (const item of items) {
+      const id = item.split("_").slice(2).join("_");
+      if (!id) continue;
+      const dir = path.join(ARCHIVE_DIR, day, item);
+      const files = await fs.readdir(dir).catch(() => [] as string[]);
+      const cover = files.find((f) => /^cover\.(jpg|jpeg|webp|png)$/i.test(f));
+      map.set(id, {
+        dir,
+        cover: cover ? path.join(dir, cover) : null,
+        transcript: files.includes("transcript.md") ? path.join(dir, "transcript.md") : null,
+      });
+    }
+  }
+  archiveIndex = { map, builtAt: Date.now() };
+  return map;
+}
+
+export function videoIdFromLink(link: string): string | null {
+  const m =
+    link.match(/[?&]v=([\w-]{11})/) ||
+    link.match(/youtu\.be\/([\w-]{11})/) ||
+    link.match(/\/video\/(BV\w+)/) ||
+    link.match(/\/episode\/(\w+)/);
+  return m ? m[1] : null;
+}
+
+// Archive entry for a record's original link, if it was ingested locally.
+export async function findArchiveItem(link: string | undefined | null): Promise<ArchiveItem | null> {
+  const videoId = link ? videoIdFromLink(link) : null;
+  if (!videoId) return null;
+  return (await getArchiveIndex()).get(videoId) ?? null;
+}
@@ -0,0 +1,43 @@
+import { createHash } from "crypto";
+import type { ReactElement } from "react";
+import { renderMarkdown } from "./markdown";
+import { extractToc, type TocItem } from "./toc-utils";
+
+// Article bodies are compiled once per distinct content: quotes section
+// stripped, TOC extracted and markdown parsed into a React tree. Results are
+// cached by body hash, so re-renders and revalidations of unchanged records
+// skip the markdown pipeline entirely.
+
+const MAX_ENTRIES = 200;
+
+export interface CompiledArticle {
+  toc: TocItem[];
+  content: ReactElement;
+}
+
+const cache = new Map<string, CompiledArticle>();
+
+export function stripQuotesSection(body: string): string {
+  let result = body.replace(/\n## 金句[^\n]*\n[\s\S]*?(?=\n## |\n# |$)/, "");
+  result = result.replace(/^金句精选\n[\s\S]*?(?=\n---\n)/, "");
+  result = result.replace(/\n金句精选\n[\s\S]*?(?=\n---\n)/, "");
+  return result;
+}
+
+export function compileArticle(body: string): CompiledArticle {
+  const key = createHash("sha256").update(body).digest("hex");
+  const hit = cache.get(key);
+  if (hit) {
+    // Re-insert to mark as most recently used
+    cache.delete(key);
+    cache.set(key, hit);
+    return hit;
+  }
+
+  const stripped = stripQuotesSection(body);
+  const toc = extractToc(stripped);
+  const compiled = { toc, content: renderMarkdown(stripped, toc) };
+  cache.set(key, compiled);
+  if (cache.size > MAX_ENTRIES) cache.delete(cache.keys().next().value!);
+  return compiled;
+}
@@ -1,7 +1,8 @@
 "use client";
 
-import { useState, useMemo } from "react";
+import { useState, useMemo, useEffect, useRef } from "react";
 import Link from "next/link";
+import Image from "next/image";
 
 interface ContentItem {
   id: string;
@@ -11,6 +12,23 @@ interface ContentItem {
   publishDate: number;
   coverFileToken?: string | null;
   tags: string[];
+  snippet?: string;
+}
+
+interface SearchPage {
+  total: number;
+  page: number;
+  hits: ContentItem[];
+}
+
+const PAGE_SIZE = 24;
+
+async function fetchPage(q: string, tag: string | null, page: number, signal?: AbortSignal): Promise<SearchPage> {
+  const params = new URLSearchParams({ q, page: String(page), pageSize: String(PAGE_SIZE) });
+  if (tag) params.set("tag", tag);
+  const res = await fetch(`/api/search?${params}`, { signal });
+  if (!res.ok) throw new Error(`search failed: ${res.status}`);
+  return res.json();
 }
 
 function formatDate(ts: number): string {
@@ -34,15 +52,20 @@ const TAG_ORDER = [
   "AI Business", "AI Principles", "Personal Productivity", "Physical AI",
 ];
 
-export function ContentGrid({ records }: { records: ContentItem[] }) {
+// `records` is the first page of published records; further pages, tag
+// filters and search results come from /api/search.
+export function ContentGrid({ records, total, tags }: { records: ContentItem[]; total: number; tags: string[] }) {
   const [activeTag, setActiveTag] = useState<string | null>(null);
   const [search, setSearch] = useState("");
+  const [results, setResults] = useState<{ items: ContentItem[]; total: number; page: number } | null>(null);
+  const [loading, setLoading] = useState(false);
+  const [failed, setFailed] = useState(false);
+  // Query and tag the current results belong to; responses for older ones are dropped
+  const resultsKey = useRef("");
 
-  // Collect tags from data, sorted by preferred order
+  // Tags sorted by preferred order
   const allTags = useMemo(() => {
-    const tagSet = new Set<string>();
-    records.forEach((r) => r.tags.forEach((t) => tagSet.add(t)));
-    return Array.from(tagSet).sort((a, b) => {
+    return [...tags].sort((a, b) => {
       const ia = TAG_ORDER.indexOf(a);
       const ib = TAG_ORDER.indexOf(b);
       if (ia >= 0 && ib >= 0) return ia - ib;
@@ -50,28 +73,61 @@ export function ContentGrid({ records }: { records: ContentItem[] }) {
       if (ib >= 0) return 1;
       return a.localeCompare(b);
     });
-  }, [records]);
-
-  // Filter records
-  const filtered = useMemo(() => {
-    let result = records;
-    if (activeTag === "__new__") {
-      // Show latest 5
-      result = result.slice(0, 5);
-    } else if (activeTag) {
-      result = result.filter((r) => r.tags.includes(activeTag));
-    }
-    if (search.trim()) {
-      const q = search.trim().toLowerCase();
-      result = result.filter(
-        (r) =>
-          r.title.toLowerCase().includes(q) ||
-          r.guests.toLowerCase().includes(q) ||
-          r.tags.some((t) => t.toLowerCase().includes(q))
-      );
-    }
-    return result;
-  }, [records, activeTag, search]);
+  }, [tags]);
+
+  const query = search.trim();
+  const tagFilter = activeTag === "__new__" ? null : activeTag;
+  const remote = query !== "" || tagFilter !== null;
+
+  // Fetch the first page whenever the query or tag changes
+  useEffect(() => {
+    resultsKey.current = `${query}\u0000${tagFilter ?? ""}`;
+    setResults(null);
+    setFailed(false);
+    setLoading(false);
+    if (!remote) return;
+    const controller = new AbortController();
+    const timer = setTimeout(() => {
+      setLoading(true);
+      fetchPage(query, tagFilter, 1, controller.signal)
+        .then((data) => setResults({ items: data.hits, total: data.total, page: data.page }))
+        .catch(() => {
+          if (!controller.signal.aborted) setFailed(true);
+        })
+        .finally(() => {
+          if (!controller.signal.aborted) setLoading(false);
+        });
+    }, query ? 250 : 0);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, tagFilter, remote]);
+
+  const view = results ?? { items: remote ? [] : records, total: remote ? 0 : total, page: 1 };
+  const searching = remote && results === null && !failed;
+  // "New" shows the latest 5
+  const newOnly = activeTag === "__new__" && !query;
+  const filtered = newOnly ? records.slice(0, 5) : view.items;
+  const hasMore = !newOnly && view.items.length < view.total;
+
+  const loadMore = () => {
+    const key = resultsKey.current;
+    const base = view;
+    setLoading(true);
+    setFailed(false);
+    fetchPage(query, tagFilter, base.page + 1)
+      .then((data) => {
+        if (resultsKey.current !== key) return;
+        setResults({ items: [...base.items, ...data.hits], total: data.total, page: data.page });
+      })
+      .catch(() => {
+        if (resultsKey.current === key) setFailed(true);
+      })
+      .finally(() => {
+        if (resultsKey.current === key) setLoading(false);
+      });
+  };
 
   return (
     <>
@@ -90,7 +146,7 @@ export function ContentGrid({ records }: { records: ContentItem[] }) {
             type="text"
             value={search}
             onChange={(e) => setSearch(e.target.value)}
-            placeholder="搜索标题、嘉宾、标签..."
+            placeholder="搜索标题、嘉宾、标签、正文..."
             className="w-full font-mono"
             style={{
               padding: "10px 12px 10px 36px",
@@ -137,7 +193,7 @@ export function ContentGrid({ records }: { records: ContentItem[] }) {
       {(activeTag || search.trim()) && (
         <div className="mb-6">
           <span className="font-mono" style={{ fontSize: "0.6rem", color: "var(--muted)", letterSpacing: "0.1em" }}>
-            {filtered.length} 篇结果
+            {searching ? "搜索中…" : remote && results === null ? "搜索失败" : `${remote ? view.total : filtered.length} 篇结果`}
             {activeTag && <> · 标签: {activeTag}</>}
             {search.trim() && <> · 关键词: {search.trim()}</>}
           </span>
@@ -156,10 +212,13 @@ export function ContentGrid({ records }: { records: ContentItem[] }) {
             {/* Cover */}
             <div className="relative overflow-hidden" style={{ aspectRatio: "16/9", background: "var(--paper-dark)" }}>
               {r.coverFileToken ? (
-                <img
+                <Image
                   src={`/api/cover?token=${r.coverFileToken}`}
                   alt={r.title}
-                  className="w-full h-full object-cover"
+                  fill
+                  sizes="(min-width: 1280px) 33vw, (min-width: 768px) 50vw, 100vw"
+                  priority={i < 3}
+                  className="object-cover"
                   style={{ transition: "transform 0.5s ease" }}
                   onMouseOver={(e) => (e.currentTarget.style.transform = "scale(1.04)")}
                   onMouseOut={(e) => (e.currentTarget.style.transform = "scale(1)")}
@@ -190,6 +249,11 @@ export function ContentGrid({ records }: { records: ContentItem[] }) {
               <h2 className="font-serif" style={{ fontSize: "1.05rem", fontWeight: 400, lineHeight: 1.4, color: "var(--ink)", letterSpacing: "-0.01em" }}>
                 {r.title}
               </h2>
+              {r.snippet && (
+                <p className="mt-2" style={{ fontSize: "0.78rem", lineHeight: 1.6, color: "var(--muted)" }}>
+                  {r.snippet}
+                </p>
+              )}
               {r.guests && (
                 <p className="mt-2 font-mono" style={{ fontSize: "0.65rem", color: "var(--gold)", letterSpacing: "0.05em" }}>
                   {r.guests.split(/[,，]/)[0].trim()}
@@ -207,11 +271,19 @@ export function ContentGrid({ records }: { records: ContentItem[] }) {
         ))}
       </div>
 
-      {filtered.length === 0 && (
+      {hasMore && (
+        <div className="text-center mt-10">
+          <button onClick={loadMore} disabled={loading} className="paper-btn">
+            {loading ? "加载中…" : failed ? "加载失败，重试" : "加载更多"}
+          </button>
+        </div>
+      )}
+
+      {filtered.length === 0 && !searching && (
         <div className="text-center py-24">
           <p className="font-serif" style={{ fontSize: "3rem", color: "var(--border-dark)" }}>◇</p>
           <p className="font-mono mt-4" style={{ fontSize: "0.7rem", color: "var(--muted)", letterSpacing: "0.1em", textTransform: "uppercase" }}>
-            {records.length === 0 ? "暂无内容，敬请期待" : "没有匹配的内容"}
+            {failed ? "搜索失败，请稍后重试" : records.length === 0 ? "暂无内容，敬请期待" : "没有匹配的内容"}
           </p>
         </div>
       )}
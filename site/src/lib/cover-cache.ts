@@ -0,0 +1,223 @@
+import { createHash } from "crypto";
+import { promises as fs } from "fs";
+import path from "path";
+import { findArchiveItem } from "./archive";
+import { prisma } from "./db";
+import { getCoverUrl } from "./feishu";
+
+// Original cover bytes, cached in two tiers keyed by content hash:
+// an in-process LRU bounded by bytes, and an on-disk store bounded by bytes.
+// Misses prefer the local content-archive cover over a Feishu download;
+// tokens with no cover anywhere are remembered for MISS_TTL_MS.
+// Resized WebP variants are produced and cached by next/image on top of this.
+
+const MEMORY_LIMIT_BYTES = 64 * 1024 * 1024;
+const DISK_LIMIT_BYTES = 512 * 1024 * 1024;
+const MISS_TTL_MS = 5 * 60 * 1000;
+const MISS_LIMIT = 10_000;
+const CACHE_DIR = process.env.COVER_CACHE_DIR ?? path.join(process.cwd(), ".cache/covers");
+
+export interface Cover {
+  buf: ArrayBuffer;
+  ct: string;
+  etag: string;
+}
+
+class ByteLru {
+  private map = new Map<string, Cover>();
+  private bytes = 0;
+
+  constructor(private limit: number) {}
+
+  get(key: string): Cover | undefined {
+    const hit = this.map.get(key);
+    if (hit) {
+      // Re-insert to mark as most recently used
+      this.map.delete(key);
+      this.map.set(key, hit);
+    }
+    return hit;
+  }
+
+  set(key: string, value: Cover) {
+    const prev = this.map.get(key);
+    if (prev) {
+      this.bytes -= prev.buf.byteLength;
+      this.map.delete(key);
+    }
+    if (value.buf.byteLength > this.limit) return;
+    this.map.set(key, value);
+    this.bytes += value.buf.byteLength;
+    for (const [k, v] of this.map) {
+      if (this.bytes <= this.limit) break;
+      this.map.delete(k);
+      this.bytes -= v.buf.byteLength;
+    }
+  }
+}
+
+const memory = new ByteLru(MEMORY_LIMIT_BYTES);
+const inflight = new Map<string, Promise<Cover | null>>();
+// token -> when it was found to have no cover; oldest first
+const misses = new Map<string, number>();
+
+function recentMiss(token: string): boolean {
+  const at = misses.get(token);
+  if (at === undefined) return false;
+  if (Date.now() - at < MISS_TTL_MS) return true;
+  misses.delete(token);
+  return false;
+}
+
+function recordMiss(token: string) {
+  misses.delete(token);
+  misses.set(token, Date.now());
+  for (const k of misses.keys()) {
+    if (misses.size <= MISS_LIMIT) break;
+    misses.delete(k);
+  }
+}
+
+function toArrayBuffer(buf: Buffer): ArrayBuffer {
+  return buf.buffer.slice(buf.byteOffset, buf.byteOffset + buf.byteLength) as ArrayBuffer;
+}
+
+function makeCover(buf: Buffer, ct: string): Cover {
+  const hash = createHash("sha256").update(buf).digest("hex");
+  return { buf: toArrayBuffer(buf), ct, etag: `"${hash}"` };
+}
+
+function contentType(file: string): string {
+  const ext = path.extname(file).toLowerCase();
+  if (ext === ".webp") return "image/webp";
+  if (ext === ".png") return "image/png";
+  return "image/jpeg";
+}
+
+// ── Disk tier ─────────────────────────────────────────────────
+// blobs/<sha256> holds the bytes, tokens/<token> holds "<sha256> <content-type>".
+
+let diskBytes: number | null = null;
+
+async function diskUsage(): Promise<number> {
+  if (diskBytes === null) {
+    const blobs = path.join(CACHE_DIR, "blobs");
+    const names = await fs.readdir(blobs).catch(() => [] as string[]);
+    const sizes = await Promise.all(names.map((n) => fs.stat(path.join(blobs, n)).then((s) => s.size, () => 0)));
+    diskBytes = sizes.reduce((a, b) => a + b, 0);
+  }
+  return diskBytes;
+}
+
+async function evictDisk() {
+  const blobs = path.join(CACHE_DIR, "blobs");
+  const names = await fs.readdir(blobs).catch(() => [] as string[]);
+  const stats = await Promise.all(
+    names.map(async (n) => {
+      const s = await fs.stat(path.join(blobs, n));
+      return { file: path.join(blobs, n), size: s.size, used: s.atimeMs };
+    })
+  );
+  stats.sort((a, b) => a.used - b.used);
+  let total = stats.reduce((a, s) => a + s.size, 0);
+  const kept = new Set(names);
+  // Evict down to 90% so we don't rescan on every write
+  for (const s of stats) {
+    if (total <= DISK_LIMIT_BYTES * 0.9) break;
+    await fs.rm(s.file, { force: true });
+    kept.delete(path.basename(s.file));
+    total -= s.size;
+  }
+  diskBytes = total;
+  await sweepTokens(kept);
+}
+
+// Drop token files whose blob is gone. `kept` is the blobs known to survive;
+// anything else is checked on disk, since a write may have raced the eviction.
+async function sweepTokens(kept: Set<string>) {
+  const dir = path.join(CACHE_DIR, "tokens");
+  const tokens = await fs.readdir(dir).catch(() => [] as string[]);
+  for (const token of tokens) {
+    const file = path.join(dir, token);
+    const hash = (await fs.readFile(file, "utf8").catch(() => "")).split(" ")[0];
+    if (kept.has(hash)) continue;
+    const exists = hash ? await fs.stat(path.join(CACHE_DIR, "blobs", hash)).then(() => true, () => false) : false;
+    if (!exists) await fs.rm(file, { force: true });
+  }
+}
+
+async function readDisk(token: string): Promise<Cover | null> {
+  try {
+    const [hash, ct] = (await fs.readFile(path.join(CACHE_DIR, "tokens", token), "utf8")).split(" ");
+    const buf = await fs.readFile(path.join(CACHE_DIR, "blobs", hash));
+    return { buf: toArrayBuffer(buf), ct, etag: `"${hash}"` };
+  } catch {
+    return null;
+  }
+}
+
+async function writeDisk(token: string, buf: Buffer, cover: Cover) {
+  const hash = cover.etag.slice(1, -1);
+  await fs.mkdir(path.join(CACHE_DIR, "blobs"), { recursive: true });
+  await fs.mkdir(path.join(CACHE_DIR, "tokens"), { recursive: true });
+  const blob = path.join(CACHE_DIR, "blobs", hash);
+  const exists = await fs.stat(blob).then(() => true, () => false);
+  if (!exists) {
+    const used = await diskUsage();
+    await fs.writeFile(blob, buf);
+    diskBytes = used + buf.byteLength;
+  }
+  await fs.writeFile(path.join(CACHE_DIR, "tokens", token), `${hash} ${cover.ct}`);
+  if ((await diskUsage()) > DISK_LIMIT_BYTES) await evictDisk();
+}
+
+// ── Sources ───────────────────────────────────────────────────
+
+async function readArchiveCover(token: string): Promise<{ buf: Buffer; ct: string } | null> {
+  const record = await prisma.feishuRecord.findFirst({
+    where: { coverFileToken: token },
+    select: { sourceLink: true },
+  });
+  if (!record?.sourceLink) return null;
+  const file = (await findArchiveItem(JSON.parse(record.sourceLink).link))?.cover;
+  if (!file) return null;
+  return { buf: await fs.readFile(file), ct: contentType(file) };
+}
+
+async function downloadFeishuCover(token: string): Promise<{ buf: Buffer; ct: string } | null> {
+  const url = await getCoverUrl(token);
+  if (!url) return null;
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`cover fetch failed: ${res.status}`);
+  return {
+    buf: Buffer.from(await res.arrayBuffer()),
+    ct: res.headers.get("content-type") || "image/jpeg",
+  };
+}
+
+async function loadCover(token: string): Promise<Cover | null> {
+  const disk = await readDisk(token);
+  if (disk) return disk;
+
+  const source = (await readArchiveCover(token).catch(() => null)) ?? (await downloadFeishuCover(token));
+  if (!source) return null;
+  const cover = makeCover(source.buf, source.ct);
+  await writeDisk(token, source.buf, cover).catch((e) => console.warn(`Cover cache write failed: ${e}`));
+  return cover;
+}
+
+export async function getCover(token: string): Promise<Cover | null> {
+  const hit = memory.get(token);
+  if (hit) return hit;
+  if (recentMiss(token)) return null;
+
+  let pending = inflight.get(token);
+  if (!pending) {
+    pending = loadCover(token).finally(() => inflight.delete(token));
+    inflight.set(token, pending);
+  }
+  const cover = await pending;
+  if (cover) memory.set(token, cover);
+  else recordMiss(token);
+  return cover;
+}
@@ -1,7 +1,10 @@
+import { prisma } from "./db";
+
 const FEISHU_APP_ID = process.env.FEISHU_APP_ID!;
 const FEISHU_APP_SECRET = process.env.FEISHU_APP_SECRET!;
 const FEISHU_BITABLE_APP_TOKEN = process.env.FEISHU_BITABLE_APP_TOKEN!;
 const FEISHU_TABLE_ID = process.env.FEISHU_TABLE_ID!;
+const FEISHU_MODIFIED_FIELD = process.env.FEISHU_MODIFIED_FIELD;
 
 let cachedToken: { token: string; expiresAt: number } | null = null;
 
@@ -37,7 +40,6 @@ export interface ContentRecord {
   publishDate: number;
   platform: string;
   coverFileToken: string | null;
-  coverUrl?: string;
   tags: string[];
   body: string;
   quotes: string[];
@@ -68,35 +70,97 @@ function parseRecord(item: Record<string, unknown>): ContentRecord {
     status: (f["状态"] as string) || "",
   };
 }
-export async function getRecords(): Promise<ContentRecord[]> {
+
+const RECORDS_URL = `https://open.feishu.cn/open-apis/bitable/v1/apps/${FEISHU_BITABLE_APP_TOKEN}/tables/${FEISHU_TABLE_ID}/records`;
+
+// Authenticated Feishu call; retries once if the cached token has expired.
+async function feishuFetch(url: string, init: RequestInit = {}) {
   let token = await getAccessToken();
-  const records: ContentRecord[] = [];
+  const send = () =>
+    fetch(url, {
+      ...init,
+      headers: { ...init.headers, Authorization: `Bearer ${token}` },
+    }).then((res) => res.json());
+  let data = await send();
+
+  // Retry once if token expired
+  if (data.code !== 0 && data.msg?.includes("access token")) {
+    cachedToken = null;
+    token = await getAccessToken();
+    data = await send();
+  }
+  return data;
+}
+
+interface FetchedRecord {
+  record: ContentRecord;
+  modifiedAt: number;
+}
+
+function parseFetched(item: Record<string, unknown>): FetchedRecord {
+  return {
+    record: parseRecord(item),
+    modifiedAt: (item.last_modified_time as number) || 0,
+  };
+}
+
+async function fetchAllRecords(): Promise<FetchedRecord[]> {
+  const records: FetchedRecord[] = [];
   let pageToken: string | undefined;
-  let retried = false;
 
   do {
-    const url = new URL(
-      `https://open.feishu.cn/open-apis/bitable/v1/apps/${FEISHU_BITABLE_APP_TOKEN}/tables/${FEISHU_TABLE_ID}/records`
-    );
-    url.searchParams.set("page_size", "100");
+    const url = new URL(RECORDS_URL);
+    url.searchParams.set("page_size", "500");
+    url.searchParams.set("automatic_fields", "true");
     if (pageToken) url.searchParams.set("page_token", pageToken);
 
-    const res = await fetch(url.toString(), {
-      headers: { Authorization: `Bearer ${token}` },
-    });
-    const data = await res.json();
+    const data = await feishuFetch(url.toString());
+    if (data.code !== 0) throw new Error(`Feishu records failed: ${data.msg}`);
 
-    // Retry once if token expired
-    if (data.code !== 0 && data.msg?.includes("access token") && !retried) {
-      cachedToken = null;
-      token = await getAccessToken();
-      retried = true;
-      continue;
+    for (const item of data.data.items || []) {
+      records.push(parseFetched(item));
     }
-    if (data.code !== 0) throw new Error(`Feishu records failed: ${data.msg}`);
+    pageToken = data.data.has_more ? data.data.page_token : undefined;
+  } while (pageToken);
+
+  return records;
+}
+
+// Records modified after `since`, via the search API. Needs a "last modified
+// time" field in the table, named by FEISHU_MODIFIED_FIELD.
+//
+// Bitable date filters compare whole days, so "isGreater ExactDate since"
+// would skip records edited later on the cursor's own day. Asking for
+// everything after the previous day re-fetches up to a day's worth of records;
+// the mirror upsert makes those repeats harmless.
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+async function fetchModifiedSince(since: number): Promise<FetchedRecord[]> {
+  const records: FetchedRecord[] = [];
+  let pageToken: string | undefined;
+
+  do {
+    const url = new URL(`${RECORDS_URL}/search`);
+    url.searchParams.set("page_size", "500");
+    if (pageToken) url.searchParams.set("page_token", pageToken);
+
+    const data = await feishuFetch(url.toString(), {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        automatic_fields: true,
+        filter: {
+          conjunction: "and",
+          conditions: [
+            { field_name: FEISHU_MODIFIED_FIELD, operator: "isGreater", value: ["ExactDate", String(since - DAY_MS)] },
+          ],
+        },
+      }),
+    });
+    if (data.code !== 0) throw new Error(`Feishu search failed: ${data.msg}`);
 
     for (const item of data.data.items || []) {
-      records.push(parseRecord(item));
+      records.push(parseFetched(item));
     }
     pageToken = data.data.has_more ? data.data.page_token : undefined;
   } while (pageToken);
@@ -104,34 +168,144 @@ export async function getRecords(): Promise<ContentRecord[]> {
   return records;
 }
 
-export async function getRecord(id: string): Promise<ContentRecord> {
-  let token = await getAccessToken();
-  let res = await fetch(
-    `https://open.feishu.cn/open-apis/bitable/v1/apps/${FEISHU_BITABLE_APP_TOKEN}/tables/${FEISHU_TABLE_ID}/records/${id}`,
-    { headers: { Authorization: `Bearer ${token}` } }
+async function fetchRecord(id: string): Promise<FetchedRecord> {
+  const data = await feishuFetch(`${RECORDS_URL}/${id}?automatic_fields=true`);
+  if (data.code !== 0) throw new Error(`Feishu record failed: ${data.msg}`);
+  return parseFetched(data.data.record);
+}
+
+// ── Local mirror ──────────────────────────────────────────────
+// Pages read records from the FeishuRecord table. The mirror is refreshed in
+// the background once it is older than MIRROR_TTL_MS: by modified-time delta
+// when FEISHU_MODIFIED_FIELD is configured, with a full reconcile (which also
+// drops deleted records) every FULL_SYNC_MS. Concurrent callers share a single
+// in-flight refresh.
+
+const MIRROR_TTL_MS = 5 * 60 * 1000;
+const FULL_SYNC_MS = 6 * 60 * 60 * 1000;
+const SYNC_KEY = "feishu";
+
+let refreshing: Promise<void> | null = null;
+
+type MirrorRow = Awaited<ReturnType<typeof prisma.feishuRecord.findMany>>[number];
+
+function toRow({ record, modifiedAt }: FetchedRecord) {
+  return {
+    id: record.id,
+    title: record.title,
+    guests: record.guests,
+    sourceLink: record.sourceLink ? JSON.stringify(record.sourceLink) : null,
+    publishDate: record.publishDate,
+    platform: record.platform,
+    coverFileToken: record.coverFileToken,
+    tags: JSON.stringify(record.tags),
+    body: record.body,
+    quotes: JSON.stringify(record.quotes),
+    status: record.status,
+    modifiedAt,
+  };
+}
+
+function fromRow(row: MirrorRow): ContentRecord {
+  return {
+    id: row.id,
+    title: row.title,
+    guests: row.guests,
+    sourceLink: row.sourceLink ? JSON.parse(row.sourceLink) : null,
+    publishDate: row.publishDate,
+    platform: row.platform,
+    coverFileToken: row.coverFileToken,
+    tags: JSON.parse(row.tags),
+    body: row.body,
+    quotes: JSON.parse(row.quotes),
+    status: row.status,
+  };
+}
+
+async function writeMirror(records: FetchedRecord[]) {
+  await prisma.$transaction(
+    records.map((r) => {
+      const data = toRow(r);
+      return prisma.feishuRecord.upsert({ where: { id: data.id }, update: data, create: data });
+    })
   );
-  let data = await res.json();
+}
 
-  // Retry once if token expired
-  if (data.code !== 0 && data.msg?.includes("access token")) {
-    cachedToken = null;
-    token = await getAccessToken();
-    res = await fetch(
-      `https://open.feishu.cn/open-apis/bitable/v1/apps/${FEISHU_BITABLE_APP_TOKEN}/tables/${FEISHU_TABLE_ID}/records/${id}`,
-      { headers: { Authorization: `Bearer ${token}` } }
-    );
-    data = await res.json();
+async function doRefresh() {
+  const state = await prisma.syncState.findUnique({ where: { key: SYNC_KEY } });
+  const full =
+    !state?.fullSyncAt ||
+    !FEISHU_MODIFIED_FIELD ||
+    Date.now() - state.fullSyncAt.getTime() > FULL_SYNC_MS;
+
+  if (state && !full) {
+    try {
+      const changed = await fetchModifiedSince(state.cursor);
+      await writeMirror(changed);
+      const cursor = Math.max(state.cursor, ...changed.map((r) => r.modifiedAt));
+      await prisma.syncState.update({ where: { key: SYNC_KEY }, data: { cursor } });
+      return;
+    } catch (e) {
+      console.warn(`Feishu delta sync failed, falling back to full sync: ${e}`);
+    }
   }
 
-  if (data.code !== 0) throw new Error(`Feishu record failed: ${data.msg}`);
-  return parseRecord(data.data.record);
+  const all = await fetchAllRecords();
+  await writeMirror(all);
+  await prisma.feishuRecord.deleteMany({ where: { id: { notIn: all.map((r) => r.record.id) } } });
+  const cursor = Math.max(0, ...all.map((r) => r.modifiedAt));
+  const fullSyncAt = new Date();
+  await prisma.syncState.upsert({
+    where: { key: SYNC_KEY },
+    update: { cursor, fullSyncAt },
+    create: { key: SYNC_KEY, cursor, fullSyncAt },
+  });
+}
+
+export function refreshMirror(): Promise<void> {
+  if (!refreshing) {
+    refreshing = doRefresh().finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
+// Blocks only on the very first sync; afterwards stale data is served while a
+// background refresh catches up.
+export async function ensureMirror() {
+  const state = await prisma.syncState.findUnique({ where: { key: SYNC_KEY } });
+  if (!state) {
+    await refreshMirror();
+    return;
+  }
+  if (Date.now() - state.syncedAt.getTime() > MIRROR_TTL_MS) {
+    refreshMirror().catch((e) => console.warn(`Feishu mirror refresh failed: ${e}`));
+  }
+}
+
+export async function getRecordIds(): Promise<string[]> {
+  await ensureMirror();
+  const rows = await prisma.feishuRecord.findMany({ select: { id: true } });
+  return rows.map((r) => r.id);
+}
+
+export async function getRecord(id: string): Promise<ContentRecord> {
+  await ensureMirror();
+  const row = await prisma.feishuRecord.findUnique({ where: { id } });
+  if (row) return fromRow(row);
+
+  // Not mirrored yet (created since the last sync)
+  const fetched = await fetchRecord(id);
+  await writeMirror([fetched]);
+  return fetched.record;
 }
 
 export async function getCoverUrl(fileToken: string): Promise<string> {
   try {
     const token = await getAccessToken();
     const res = await fetch(
-      `https://open.feishu.cn/open-apis/drive/v1/medias/batch_get_tmp_download_url?file_tokens=${fileToken}`,
+      `https://open.feishu.cn/open-apis/drive/v1/medias/batch_get_tmp_download_url?file_tokens=${encodeURIComponent(fileToken)}`,
       { headers: { Authorization: `Bearer ${token}` } }
     );
     const data = await res.json();
@@ -147,45 +321,3 @@ export async function getCoverUrl(fileToken: string): Promise<string> {
     return "";
   }
 }
-
-export async function getRecordWithCover(
-  id: string
-): Promise<ContentRecord> {
-  const record = await getRecord(id);
-  if (record.coverFileToken) {
-    record.coverUrl = await getCoverUrl(record.coverFileToken);
-  }
-  return record;
-}
-
-// Shared cover URL cache (token -> { url, expiresAt })
-const coverUrlCache = new Map<string, { url: string; expiresAt: number }>();
-
-export async function getRecordsWithCovers(): Promise<ContentRecord[]> {
-  const records = await getRecords();
-  const fileTokens = records
-    .map((r) => r.coverFileToken)
-    .filter(Boolean) as string[];
-
-  if (fileTokens.length > 0) {
-    const token = await getAccessToken();
-    const params = fileTokens.map((t) => `file_tokens=${t}`).join("&");
-    const res = await fetch(
-      `https://open.feishu.cn/open-apis/drive/v1/medias/batch_get_tmp_download_url?${params}`,
-      { headers: { Authorization: `Bearer ${token}` } }
-    );
-    const data = await res.json();
-    if (data.code === 0 && data.data?.tmp_download_urls) {
-      const expiresAt = Date.now() + 25 * 60 * 1000;
-      for (const item of data.data.tmp_download_urls) {
-        coverUrlCache.set(item.file_token, { url: item.tmp_download_url, expiresAt });
-      }
-      for (const record of records) {
-        if (record.coverFileToken) {
-          record.coverUrl = coverUrlCache.get(record.coverFileToken)?.url || "";
-        }
-      }
-    }
-  }
-  return records;
-}
@@ -1,38 +1,58 @@
-"use client";
-
-import ReactMarkdown from "react-markdown";
+import Markdown from "react-markdown";
 import remarkGfm from "remark-gfm";
 import type { Components } from "react-markdown";
 import React from "react";
-import { slugify } from "./toc-utils";
+import { slugify, type TocItem } from "./toc-utils";
+
+// Rendered on the server only: the markdown parser never reaches the client.
+
+interface HastNode {
+  type: string;
+  tagName?: string;
+  value?: string;
+  properties?: Record<string, unknown>;
+  children?: HastNode[];
+}
+
+function hastText(node: HastNode): string {
+  if (node.type === "text") return node.value ?? "";
+  return (node.children ?? []).map(hastText).join("");
+}
 
-function childrenToText(children: React.ReactNode): string {
-  if (typeof children === "string") return children;
-  if (Array.isArray(children)) return children.map(childrenToText).join("");
-  if (React.isValidElement(children) && children.props) {
-    // eslint-disable-next-line @typescript-eslint/no-explicit-any
-    const props = children.props as any;
-    if (props.children) {
-      return childrenToText(props.children);
-    }
-  }
-  return String(children ?? "");
+// Gives h2/h3 the ids extractToc() computed from the source lines, so TOC
+// links always resolve; other headings fall back to slugify().
+function rehypeHeadingIds(toc: TocItem[]) {
+  return (tree: HastNode) => {
+    const queue = [...toc];
+    const walk = (node: HastNode) => {
+      const m = node.type === "element" ? node.tagName?.match(/^h([1-6])$/) : null;
+      if (m) {
+        const level = Number(m[1]);
+        const text = hastText(node);
+        let i = queue.findIndex((t) => t.level === level && t.id === slugify(text));
+        if (i < 0) i = queue.findIndex((t) => t.level === level);
+        const id = i >= 0 && (level === 2 || level === 3) ? queue.splice(i, 1)[0].id : slugify(text);
+        node.properties = { ...node.properties, id };
+        return;
+      }
+      node.children?.forEach(walk);
+    };
+    walk(tree);
+  };
 }
 
 const components: Components = {
-  h1: ({ children }) => {
-    const text = childrenToText(children);
+  h1: ({ children, id }) => {
     return (
-      <h1 id={slugify(text)} className="font-serif mt-10 mb-4" style={{ fontSize: "1.6rem", fontWeight: 400, color: "var(--ink)", letterSpacing: "-0.02em", lineHeight: 1.25 }}>
+      <h1 id={id} className="font-serif mt-10 mb-4" style={{ fontSize: "1.6rem", fontWeight: 400, color: "var(--ink)", letterSpacing: "-0.02em", lineHeight: 1.25 }}>
         {children}
       </h1>
     );
   },
-  h2: ({ children }) => {
-    const text = childrenToText(children);
+  h2: ({ children, id }) => {
     return (
       <h2
-        id={slugify(text)}
+        id={id}
         className="font-serif mt-12 mb-5"
         style={{
           fontSize: "1.35rem",
@@ -50,11 +70,10 @@ const components: Components = {
       </h2>
     );
   },
-  h3: ({ children }) => {
-    const text = childrenToText(children);
+  h3: ({ children, id }) => {
     return (
       <h3
-        id={slugify(text)}
+        id={id}
         className="font-serif mt-9 mb-3"
         style={{
           fontSize: "1.12rem",
@@ -75,16 +94,22 @@ const components: Components = {
   ),
 };
 
-export function MarkdownContent({ content }: { content: string }) {
+// Parses and renders eagerly (Markdown is a plain function component), so
+// the returned element tree can be cached and reused across requests.
+export function renderMarkdown(content: string, toc: TocItem[]): React.ReactElement {
   const bodyContent = content.replace(/^#\s+.+\n/, "");
+  const tree = Markdown({
+    children: bodyContent,
+    remarkPlugins: [remarkGfm],
+    rehypePlugins: [[rehypeHeadingIds, toc]],
+    components,
+  });
   return (
     <article
       className="prose max-w-none prose-p:leading-[1.9] prose-li:leading-[1.8]"
       style={{ color: "var(--ink-light)", fontFamily: "'PingFang SC', 'Noto Sans SC', system-ui, sans-serif" }}
     >
-      <ReactMarkdown remarkPlugins={[remarkGfm]} components={components}>
-        {bodyContent}
-      </ReactMarkdown>
+      {tree}
     </article>
   );
 }
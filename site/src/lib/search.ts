@@ -0,0 +1,333 @@
+import { promises as fs } from "fs";
+import type { Prisma } from "@prisma/client";
+import { findArchiveItem } from "./archive";
+import { prisma } from "./db";
+import { ensureMirror } from "./feishu";
+
+// Full-text search over published records: title, guests, tags, quotes, the
+// article body and, when the item was ingested locally, its transcript.
+//
+// The index is an SQLite FTS5 table next to the Feishu mirror. Text is
+// pre-tokenized here — English words plus overlapping bigrams for CJK runs —
+// and stored space-separated, so FTS5 only has to split on whitespace.
+// Chinese queries become phrase queries over consecutive bigrams, which gives
+// exact substring matches. Each run also ends with its last character as a
+// unigram, so a one-character query can prefix-match any position.
+// Snippets come from a plain-text copy stored alongside (search_text), so
+// queries never touch transcript files on disk. The index is synced incrementally against the
+// mirror's record versions at most once per INDEX_TTL_MS.
+
+const INDEX_TTL_MS = 60 * 1000;
+const PUBLISHED = "已发布";
+// bm25() column weights: title, guests, tags, quotes, body, transcript
+const WEIGHTS = "10.0, 6.0, 4.0, 3.0, 1.0, 0.3";
+const SNIPPET_RADIUS = 60;
+// Bump when tokenize() or the stored text changes so every document is re-indexed.
+const TOKENIZER_VERSION = "3";
+
+const TOKEN_RE = /[\u3400-\u9fff\uf900-\ufaff]+|[a-z0-9]+/g;
+const CJK_RE = /^[\u3400-\u9fff\uf900-\ufaff]/;
+
+export interface SearchHit {
+  id: string;
+  title: string;
+  guests: string;
+  platform: string;
+  publishDate: number;
+  coverFileToken: string | null;
+  tags: string[];
+  snippet?: string;
+}
+
+export interface SearchResult {
+  total: number;
+  page: number;
+  pageSize: number;
+  hits: SearchHit[];
+}
+
+function bigrams(run: string): string[] {
+  if (run.length === 1) return [run];
+  const out: string[] = [];
+  for (let i = 0; i < run.length - 1; i++) out.push(run.slice(i, i + 2));
+  return out;
+}
+
+// Bigrams plus the trailing character, which no bigram starts with.
+function indexTokens(run: string): string[] {
+  return run.length === 1 ? [run] : [...bigrams(run), run[run.length - 1]];
+}
+
+export function tokenize(text: string): string[] {
+  const tokens: string[] = [];
+  for (const [w] of text.toLowerCase().matchAll(TOKEN_RE)) {
+    if (CJK_RE.test(w)) tokens.push(...indexTokens(w));
+    else tokens.push(w);
+  }
+  return tokens;
+}
+
+// FTS5 MATCH expression: every query term must match; CJK runs as bigram
+// phrases, a lone CJK character or the trailing English word as a prefix.
+function matchExpression(q: string): string | null {
+  const terms: string[] = [];
+  const words = Array.from(q.toLowerCase().matchAll(TOKEN_RE), (m) => m[0]);
+  words.forEach((w, i) => {
+    if (CJK_RE.test(w)) {
+      terms.push(w.length === 1 ? `"${w}"*` : `"${bigrams(w).join(" ")}"`);
+    } else {
+      terms.push(i === words.length - 1 ? `"${w}"*` : `"${w}"`);
+    }
+  });
+  return terms.length > 0 ? terms.join(" AND ") : null;
+}
+
+// ── Index maintenance ─────────────────────────────────────────
+
+let schemaReady: Promise<void> | null = null;
+let syncing: Promise<void> | null = null;
+let lastSync = 0;
+
+function ensureSchema(): Promise<void> {
+  schemaReady ??= (async () => {
+    await prisma.$executeRawUnsafe(
+      `CREATE TABLE IF NOT EXISTS search_docs (rowid INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, version TEXT NOT NULL)`
+    );
+    await prisma.$executeRawUnsafe(
+      `CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, guests, tags, quotes, body, transcript, tokenize = 'unicode61')`
+    );
+    await prisma.$executeRawUnsafe(
+      `CREATE TABLE IF NOT EXISTS search_text (rowid INTEGER PRIMARY KEY, body TEXT NOT NULL, quotes TEXT NOT NULL, transcript TEXT NOT NULL)`
+    );
+  })();
+  return schemaReady;
+}
+
+function recordVersion(row: { modifiedAt: number; syncedAt: Date }): string {
+  return `${TOKENIZER_VERSION}:${row.modifiedAt || row.syncedAt.getTime()}`;
+}
+
+async function readTranscript(sourceLink: string | null): Promise<string> {
+  if (!sourceLink) return "";
+  const file = (await findArchiveItem(JSON.parse(sourceLink).link))?.transcript;
+  return file ? fs.readFile(file, "utf8").catch(() => "") : "";
+}
+
+async function removeDoc(id: string) {
+  await prisma.$executeRawUnsafe(
+    `DELETE FROM search_index WHERE rowid = (SELECT rowid FROM search_docs WHERE id = ?)`,
+    id
+  );
+  await prisma.$executeRawUnsafe(
+    `DELETE FROM search_text WHERE rowid = (SELECT rowid FROM search_docs WHERE id = ?)`,
+    id
+  );
+  await prisma.$executeRawUnsafe(`DELETE FROM search_docs WHERE id = ?`, id);
+}
+
+async function addDoc(id: string, version: string) {
+  const row = await prisma.feishuRecord.findUnique({ where: { id } });
+  if (!row) return;
+  const transcript = await readTranscript(row.sourceLink);
+  const quotes: string[] = JSON.parse(row.quotes);
+  const tags: string[] = JSON.parse(row.tags);
+
+  await prisma.$executeRawUnsafe(`INSERT INTO search_docs (id, version) VALUES (?, ?)`, id, version);
+  await prisma.$executeRawUnsafe(
+    `INSERT INTO search_index (rowid, title, guests, tags, quotes, body, transcript)
+     SELECT rowid, ?, ?, ?, ?, ?, ? FROM search_docs WHERE id = ?`,
+    tokenize(row.title).join(" "),
+    tokenize(row.guests).join(" "),
+    tokenize(tags.join(" ")).join(" "),
+    tokenize(quotes.join("\n")).join(" "),
+    tokenize(row.body).join(" "),
+    tokenize(transcript).join(" "),
+    id
+  );
+  await prisma.$executeRawUnsafe(
+    `INSERT INTO search_text (rowid, body, quotes, transcript)
+     SELECT rowid, ?, ?, ? FROM search_docs WHERE id = ?`,
+    plainText(row.body),
+    plainText(quotes.join("\n")),
+    plainText(transcript),
+    id
+  );
+}
+
+async function doSync() {
+  await ensureSchema();
+  await ensureMirror();
+
+  const rows = await prisma.feishuRecord.findMany({
+    select: { id: true, modifiedAt: true, syncedAt: true, status: true },
+  });
+  const wanted = new Map<string, string>();
+  for (const row of rows) {
+    if (row.status === PUBLISHED) wanted.set(row.id, recordVersion(row));
+  }
+  const indexed = new Map(
+    (await prisma.$queryRawUnsafe<{ id: string; version: string }[]>(`SELECT id, version FROM search_docs`)).map(
+      (d) => [d.id, d.version]
+    )
+  );
+
+  for (const [id, version] of indexed) {
+    if (wanted.get(id) !== version) await removeDoc(id);
+  }
+  for (const [id, version] of wanted) {
+    if (indexed.get(id) !== version) await addDoc(id, version);
+  }
+}
+
+export function syncSearchIndex(): Promise<void> {
+  if (!syncing) {
+    syncing = doSync()
+      .then(() => {
+        lastSync = Date.now();
+      })
+      .finally(() => {
+        syncing = null;
+      });
+  }
+  return syncing;
+}
+
+async function ensureIndex() {
+  if (lastSync === 0) {
+    await syncSearchIndex();
+  } else if (Date.now() - lastSync > INDEX_TTL_MS) {
+    syncSearchIndex().catch((e) => console.warn(`Search index sync failed: ${e}`));
+  }
+}
+
+// ── Queries ───────────────────────────────────────────────────
+
+// Only the columns a hit needs; bodies stay in the database.
+const HIT_SELECT = {
+  id: true,
+  title: true,
+  guests: true,
+  platform: true,
+  publishDate: true,
+  coverFileToken: true,
+  tags: true,
+} satisfies Prisma.FeishuRecordSelect;
+
+type HitRow = Prisma.FeishuRecordGetPayload<{ select: typeof HIT_SELECT }>;
+
+function toHit(row: HitRow): SearchHit {
+  return {
+    id: row.id,
+    title: row.title,
+    guests: row.guests,
+    platform: row.platform,
+    publishDate: row.publishDate,
+    coverFileToken: row.coverFileToken,
+    tags: JSON.parse(row.tags),
+  };
+}
+
+function plainText(markdown: string): string {
+  return markdown
+    .replace(/!?\[([^\]]*)\]\([^)]*\)/g, "$1")
+    .replace(/[#*>`_|-]+/g, " ")
+    .replace(/\s+/g, " ")
+    .trim();
+}
+
+// `texts` are plain-text copies from search_text.
+function makeSnippet(texts: string[], q: string): string {
+  const needles = [q.trim(), ...q.trim().split(/\s+/)]
+    .map((n) => n.toLowerCase())
+    .filter(Boolean);
+  for (const plain of texts) {
+    const lower = plain.toLowerCase();
+    for (const needle of needles) {
+      const at = lower.indexOf(needle);
+      if (at < 0) continue;
+      const start = Math.max(0, at - SNIPPET_RADIUS);
+      const end = Math.min(plain.length, at + needle.length + SNIPPET_RADIUS);
+      return `${start > 0 ? "…" : ""}${plain.slice(start, end)}${end < plain.length ? "…" : ""}`;
+    }
+  }
+  return (texts[0] ?? "").slice(0, SNIPPET_RADIUS * 2);
+}
+
+// Published records, newest first, optionally limited to one tag.
+async function browse(tag: string | null, page: number, pageSize: number): Promise<SearchResult> {
+  await ensureMirror();
+  const where = {
+    status: PUBLISHED,
+    ...(tag ? { tags: { contains: JSON.stringify(tag) } } : {}),
+  };
+  const [total, rows] = await Promise.all([
+    prisma.feishuRecord.count({ where }),
+    prisma.feishuRecord.findMany({
+      where,
+      select: HIT_SELECT,
+      orderBy: { publishDate: "desc" },
+      skip: (page - 1) * pageSize,
+      take: pageSize,
+    }),
+  ]);
+  return { total, page, pageSize, hits: rows.map(toHit) };
+}
+
+export async function search(
+  q: string,
+  { tag = null, page = 1, pageSize = 24 }: { tag?: string | null; page?: number; pageSize?: number } = {}
+): Promise<SearchResult> {
+  const match = matchExpression(q);
+  if (!match) return browse(tag, page, pageSize);
+
+  await ensureIndex();
+  const tagFilter = tag ? `AND r.tags LIKE ?` : "";
+  const tagArgs = tag ? [`%${JSON.stringify(tag)}%`] : [];
+  const from = `FROM search_index
+    JOIN search_docs d ON d.rowid = search_index.rowid
+    JOIN FeishuRecord r ON r.id = d.id
+    WHERE search_index MATCH ? ${tagFilter}`;
+
+  const [[{ n }], ranked] = await Promise.all([
+    prisma.$queryRawUnsafe<{ n: number | bigint }[]>(`SELECT count(*) AS n ${from}`, match, ...tagArgs),
+    prisma.$queryRawUnsafe<{ id: string }[]>(
+      `SELECT d.id AS id ${from} ORDER BY bm25(search_index, ${WEIGHTS}) LIMIT ? OFFSET ?`,
+      match,
+      ...tagArgs,
+      pageSize,
+      (page - 1) * pageSize
+    ),
+  ]);
+
+  const ids = ranked.map((r) => r.id);
+  const marks = ids.map(() => "?").join(", ");
+  const [rows, texts] = await Promise.all([
+    prisma.feishuRecord.findMany({ where: { id: { in: ids } }, select: HIT_SELECT }),
+    ids.length === 0
+      ? []
+      : prisma.$queryRawUnsafe<{ id: string; body: string; quotes: string; transcript: string }[]>(
+          `SELECT d.id AS id, t.body AS body, t.quotes AS quotes, t.transcript AS transcript
+           FROM search_docs d JOIN search_text t ON t.rowid = d.rowid WHERE d.id IN (${marks})`,
+          ...ids
+        ),
+  ]);
+  const byId = new Map(rows.map((r) => [r.id, r]));
+  const textById = new Map(texts.map((t) => [t.id, t]));
+
+  const hits = ids.flatMap((id) => {
+    const row = byId.get(id);
+    if (!row) return [];
+    const text = textById.get(id);
+    const snippet = text ? makeSnippet([text.body, text.quotes, text.transcript], q) : undefined;
+    return [{ ...toHit(row), snippet }];
+  });
+
+  return { total: Number(n), page, pageSize, hits };
+}
+
+// Distinct tags across published records.
+export async function publishedTags(): Promise<string[]> {
+  await ensureMirror();
+  const rows = await prisma.feishuRecord.findMany({ where: { status: PUBLISHED }, select: { tags: true } });
+  return Array.from(new Set(rows.flatMap((r) => JSON.parse(r.tags) as string[])));
+}
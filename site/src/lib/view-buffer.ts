@@ -0,0 +1,244 @@
+import { prisma } from "./db";
+
+// Page views are aggregated in memory per article and written in a single
+// transaction every FLUSH_INTERVAL_MS, once FLUSH_THRESHOLD views are pending,
+// and on shutdown. Each flush also bumps per-day buckets in ViewDaily.
+// Reads go through a short-lived snapshot that includes unflushed views, both
+// pending and in the batch currently being written.
+
+const FLUSH_INTERVAL_MS = 5000;
+const FLUSH_THRESHOLD = 200;
+const SNAPSHOT_TTL_MS = 10 * 1000;
+const DAY_MS = 24 * 60 * 60 * 1000;
+// Day buckets follow the audience's calendar, not UTC.
+const SITE_TIME_ZONE = process.env.SITE_TIME_ZONE || "Asia/Shanghai";
+
+interface Pending {
+  count: number;
+  title?: string;
+}
+
+// Pending views per day, then per article; a batch keeps its own day even if
+// it is requeued after midnight.
+type Batch = Map<string, Map<string, Pending>>;
+
+export interface ViewRow {
+  id: string;
+  articleId: string;
+  title: string | null;
+  count: number;
+  updatedAt: Date;
+}
+
+export interface DailyTotal {
+  day: string;
+  count: number;
+}
+
+// en-CA formats dates as YYYY-MM-DD
+const dayFormat = new Intl.DateTimeFormat("en-CA", {
+  timeZone: SITE_TIME_ZONE,
+  year: "numeric",
+  month: "2-digit",
+  day: "2-digit",
+});
+
+function dayKey(date: Date): string {
+  return dayFormat.format(date);
+}
+
+function today(): string {
+  return dayKey(new Date());
+}
+
+class ViewBuffer {
+  private pending: Batch = new Map();
+  private pendingTotal = 0;
+  // The batch a flush is writing: no longer pending, not yet committed.
+  private inFlight: Batch | null = null;
+  // Successful writes so far; a read that raced one isn't cached.
+  private writes = 0;
+  private writtenTitles = new Map<string, string>();
+  private flushing: Promise<void> | null = null;
+  private timer: ReturnType<typeof setInterval> | null = null;
+  private snapshot: { rows: ViewRow[]; at: number } | null = null;
+  private daily: { days: number; totals: DailyTotal[]; at: number } | null = null;
+
+  record(articleId: string, title?: string) {
+    this.add(this.pending, today(), articleId, 1, title);
+    this.pendingTotal += 1;
+
+    this.start();
+    if (this.pendingTotal >= FLUSH_THRESHOLD) void this.flush();
+  }
+
+  private start() {
+    if (this.timer) return;
+    this.timer = setInterval(() => void this.flush(), FLUSH_INTERVAL_MS);
+    this.timer.unref?.();
+    for (const signal of ["SIGTERM", "SIGINT"] as const) {
+      process.once(signal, () => {
+        void this.flush().finally(() => {
+          // Next's own shutdown handler drains requests and exits; only when
+          // nobody else is listening do we re-raise for Node's default exit.
+          if (process.listenerCount(signal) === 0) process.kill(process.pid, signal);
+        });
+      });
+    }
+    process.once("beforeExit", () => void this.flush());
+  }
+
+  flush(): Promise<void> {
+    if (this.flushing) return this.flushing.then(() => this.flush());
+    if (this.pendingTotal === 0) return Promise.resolve();
+
+    const batch = this.pending;
+    this.pending = new Map();
+    this.pendingTotal = 0;
+    this.inFlight = batch;
+
+    this.flushing = this.write(batch)
+      .then(() => {
+        this.inFlight = null;
+        this.writes += 1;
+        this.snapshot = null;
+        this.daily = null;
+      })
+      .catch((e) => {
+        console.warn(`View flush failed, will retry: ${e}`);
+        this.inFlight = null;
+        this.requeue(batch);
+      })
+      .finally(() => {
+        this.flushing = null;
+      });
+    return this.flushing;
+  }
+
+  private add(batch: Batch, day: string, articleId: string, count: number, title?: string) {
+    let articles = batch.get(day);
+    if (!articles) {
+      articles = new Map();
+      batch.set(day, articles);
+    }
+    const entry = articles.get(articleId) ?? { count: 0 };
+    entry.count += count;
+    if (title) entry.title = title;
+    articles.set(articleId, entry);
+  }
+
+  // Views not yet in the database: pending plus the in-flight batch.
+  private unflushed(): Batch[] {
+    return this.inFlight ? [this.inFlight, this.pending] : [this.pending];
+  }
+
+  // Per-article totals across all days in the given batches.
+  private totals(...batches: Batch[]): Map<string, Pending> {
+    const totals = new Map<string, Pending>();
+    for (const articles of batches.flatMap((b) => Array.from(b.values()))) {
+      for (const [articleId, { count, title }] of articles) {
+        const entry = totals.get(articleId) ?? { count: 0 };
+        entry.count += count;
+        if (title) entry.title = title;
+        totals.set(articleId, entry);
+      }
+    }
+    return totals;
+  }
+
+  private async write(batch: Batch) {
+    const totals = this.totals(batch);
+    const ops = [];
+    for (const [articleId, { count, title }] of totals) {
+      // Only rewrite the title when it actually changed
+      const titleChanged = title !== undefined && this.writtenTitles.get(articleId) !== title;
+      ops.push(
+        prisma.viewCount.upsert({
+          where: { articleId },
+          update: { count: { increment: count }, ...(titleChanged ? { title } : {}) },
+          create: { articleId, title, count },
+        })
+      );
+    }
+    for (const [day, articles] of batch) {
+      for (const [articleId, { count }] of articles) {
+        ops.push(
+          prisma.viewDaily.upsert({
+            where: { articleId_day: { articleId, day } },
+            update: { count: { increment: count } },
+            create: { articleId, day, count },
+          })
+        );
+      }
+    }
+    await prisma.$transaction(ops);
+    for (const [articleId, { title }] of totals) {
+      if (title) this.writtenTitles.set(articleId, title);
+    }
+  }
+
+  private requeue(batch: Batch) {
+    for (const [day, articles] of batch) {
+      for (const [articleId, { count, title }] of articles) {
+        const current = this.pending.get(day)?.get(articleId)?.title;
+        this.add(this.pending, day, articleId, count, current ?? title);
+        this.pendingTotal += count;
+      }
+    }
+  }
+
+  // All view counts, most viewed first, including not-yet-flushed views.
+  async getSnapshot(): Promise<ViewRow[]> {
+    let snapshot = this.snapshot;
+    if (!snapshot || Date.now() - snapshot.at > SNAPSHOT_TTL_MS) {
+      const writes = this.writes;
+      snapshot = { rows: await prisma.viewCount.findMany(), at: Date.now() };
+      if (writes === this.writes) this.snapshot = snapshot;
+    }
+    const merged = new Map(snapshot.rows.map((r) => [r.articleId, { ...r }]));
+    for (const [articleId, { count, title }] of this.totals(...this.unflushed())) {
+      const row = merged.get(articleId);
+      if (row) {
+        row.count += count;
+      } else {
+        merged.set(articleId, { id: articleId, articleId, title: title ?? null, count, updatedAt: new Date() });
+      }
+    }
+    return Array.from(merged.values()).sort((a, b) => b.count - a.count);
+  }
+
+  // Total views per day for the last `days` days, oldest first.
+  async getDailyTotals(days = 14): Promise<DailyTotal[]> {
+    let daily = this.daily;
+    if (!daily || daily.days !== days || Date.now() - daily.at > SNAPSHOT_TTL_MS) {
+      const writes = this.writes;
+      const since = dayKey(new Date(Date.now() - (days - 1) * DAY_MS));
+      const grouped = await prisma.viewDaily.groupBy({
+        by: ["day"],
+        where: { day: { gte: since } },
+        _sum: { count: true },
+      });
+      const byDay = new Map(grouped.map((g) => [g.day, g._sum.count ?? 0]));
+      const totals: DailyTotal[] = [];
+      for (let i = days - 1; i >= 0; i--) {
+        const day = dayKey(new Date(Date.now() - i * DAY_MS));
+        totals.push({ day, count: byDay.get(day) ?? 0 });
+      }
+      daily = { days, totals, at: Date.now() };
+      if (writes === this.writes) this.daily = daily;
+    }
+    const totals = daily.totals.map((t) => ({ ...t }));
+    for (const batch of this.unflushed()) {
+      for (const t of totals) {
+        for (const { count } of batch.get(t.day)?.values() ?? []) t.count += count;
+      }
+    }
+    return totals;
+  }
+}
+
+const globalForViews = globalThis as unknown as { viewBuffer: ViewBuffer };
+
+export const viewBuffer = globalForViews.viewBuffer ?? new ViewBuffer();
+
+if (process.env.NODE_ENV !== "production") globalForViews.viewBuffer = viewBuffer;
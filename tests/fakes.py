@@ -0,0 +1,93 @@
+"""Offline stand-ins shared by the pipeline tests."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from pipeline.archive import Item
+from pipeline.config import Config, Settings, Source
+from pipeline.feishu import FeishuClient
+
+
+def make_config(output_dir: Path, min_duration: int = 30) -> Config:
+    settings = Settings(output_dir=output_dir, auto_sync_feishu=False, download_covers=False)
+    settings.platform_limits["fake"] = {"concurrency": 4, "rate_per_sec": 0}
+    source = Source(platform="fake", name="Fake Channel", min_duration=min_duration)
+    return Config(settings=settings, sources=[source], api_keys={})
+
+
+class FakePlatform:
+    """Lists ``durations`` (id -> listed seconds) and serves canned captions.
+
+    ``probes`` maps ids to the duration a probe reports; an id missing from
+    it makes the probe fail.  Ids in ``fail_captions`` fail the captions
+    stage; ids in ``bad_captions`` get captions the transcript stage rejects.
+    """
+
+    name = "fake"
+
+    def __init__(self, durations: dict[str, int], probes: dict[str, int] | None = None):
+        self.durations = durations
+        self.probes = probes or {}
+        self.probed: list[str] = []
+        self.captioned: list[str] = []
+        self.fail_captions: set[str] = set()
+        self.bad_captions: set[str] = set()
+
+    async def list_items(self, source: Source, limit: int) -> list[Item]:
+        return [
+            Item(platform=self.name, source=source, id=vid, title=f"Episode {vid}",
+                 url=f"https://example.com/{vid}", duration_seconds=seconds)
+            for vid, seconds in list(self.durations.items())[:limit]
+        ]
+
+    async def probe_duration(self, item: Item) -> int:
+        self.probed.append(item.id)
+        if item.id not in self.probes:
+            raise RuntimeError("probe failed")
+        return self.probes[item.id]
+
+    async def fetch_captions(self, item: Item, dest: Path) -> Path:
+        self.captioned.append(item.id)
+        if item.id in self.fail_captions:
+            raise RuntimeError("captions unavailable")
+        path = dest / "captions.json"
+        cues = [{"start": 0.0, "text": f"Hello from {item.id}."}]
+        path.write_text("not json" if item.id in self.bad_captions else json.dumps(cues), encoding="utf-8")
+        return path
+
+
+class MockFeishuClient(FeishuClient):
+    """FeishuClient whose transport only serializes requests and fakes replies.
+
+    Every request is kept in ``calls`` as ``(path, body)``.
+    """
+
+    def __init__(self) -> None:
+        super().__init__("mock", "mock", "mock", "mock")
+        self.requests = 0
+        self.bytes_sent = 0
+        self.calls: list[tuple[str, dict[str, Any] | None]] = []
+
+    def _send(self, method: str, path: str, body: dict[str, Any] | None = None,
+              auth: bool = True, raw: bytes | None = None,
+              content_type: str = "application/json") -> dict[str, Any]:
+        data = raw if raw is not None else json.dumps(body).encode()
+        self.requests += 1
+        self.bytes_sent += len(data)
+        self.calls.append((path, body))
+        if path.endswith("tenant_access_token/internal"):
+            return {"code": 0, "tenant_access_token": "t", "expire": 7200}
+        if path.endswith("upload_all"):
+            return {"code": 0, "data": {"file_token": hashlib.sha1(data).hexdigest()}}
+        if path.endswith("batch_create"):
+            n = len((body or {}).get("records") or [])
+            return {"code": 0, "data": {"records": [{"record_id": f"rec{self.requests}_{j}"} for j in range(n)]}}
+        return {"code": 0, "data": {}}
+
+    def sent(self, endpoint: str) -> list[dict[str, Any] | None]:
+        """Bodies of the requests made to paths ending in ``endpoint``."""
+        return [body for path, body in self.calls if path.endswith(endpoint)]
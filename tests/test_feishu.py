@@ -0,0 +1,134 @@
+import io
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from pipeline import feishu
+from pipeline.archive import Item, read_front_matter, write_front_matter
+from pipeline.feishu import FeishuClient, FeishuError, sync_pending
+from pipeline.manifest import Manifest
+
+from .fakes import MockFeishuClient, make_config
+
+ARTICLE = """# 标题{n}
+
+## 金句
+1. "第一句"
+
+## 嘉宾信息
+**张三** - 创始人，某公司
+"""
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(feishu, "BATCH_SIZE", 2)
+    for n in range(3):
+        d = tmp_path / "2025-01-01" / f"fake_Fake_{n}"
+        d.mkdir(parents=True)
+        (d / "rewritten.md").write_text(ARTICLE.format(n=n), encoding="utf-8")
+        (d / "cover.jpg").write_bytes(b"\xff\xd8cover" + bytes([n]))
+        write_front_matter(d / "metadata.md", {
+            "id": str(n), "title": f"Episode {n}", "platform": "fake", "url": f"https://example.com/{n}",
+            "published_at": "2025-01-01", "tags": ["AI"], "synced_to_feishu": False,
+        })
+    manifest = Manifest.for_archive(tmp_path)
+    yield manifest
+    manifest.close()
+
+
+def touch(manifest: Manifest, video_id: str, stage: str) -> None:
+    """Record a re-run of ``stage`` for an item, as the scheduler would."""
+    entry = manifest.get("fake", video_id)
+    item = Item(platform="fake", source=make_config(manifest.archive_dir).sources[0],
+                id=video_id, title="", url="")
+    item.dir = entry.dir
+    manifest.mark_stage(item, stage)
+
+
+def test_new_items_are_created_in_chunks(archive):
+    client = MockFeishuClient()
+    assert sync_pending(archive, client) == (3, 0)
+
+    creates = client.sent("batch_create")
+    assert [len(body["records"]) for body in creates] == [2, 1]
+    assert len(client.sent("upload_all")) == 3
+    fields = creates[0]["records"][0]["fields"]
+    assert fields["标题"] == "标题0"
+    assert fields["金句1"] == "第一句"
+    assert fields["嘉宾"] == "张三（创始人）"
+    assert "封面图" in fields
+
+    for entry in archive.entries():
+        meta = read_front_matter(entry.dir / "metadata.md")
+        assert meta["synced_to_feishu"] is True
+        assert meta["feishu_record_id"] == entry.feishu_record_id
+        assert entry.synced_hash == entry.sync_hash
+
+
+def test_unchanged_items_are_not_resent(archive):
+    sync_pending(archive, MockFeishuClient())
+    client = MockFeishuClient()
+    assert sync_pending(archive, client) == (0, 0)
+    assert client.calls == []
+
+
+def test_body_change_updates_without_cover_upload(archive):
+    sync_pending(archive, MockFeishuClient())
+    entry = archive.get("fake", "1")
+    (entry.dir / "rewritten.md").write_text(ARTICLE.format(n="1 v2"), encoding="utf-8")
+    touch(archive, "1", "rewrite")
+
+    client = MockFeishuClient()
+    assert sync_pending(archive, client) == (0, 1)
+    assert client.sent("upload_all") == []
+    (record,) = client.sent("batch_update")[0]["records"]
+    assert record["record_id"] == entry.feishu_record_id
+    assert record["fields"]["标题"] == "标题1 v2"
+    assert "封面图" not in record["fields"]
+
+
+def test_cover_change_is_uploaded_again(archive):
+    sync_pending(archive, MockFeishuClient())
+    entry = archive.get("fake", "2")
+    (entry.dir / "cover.jpg").write_bytes(b"\xff\xd8new cover")
+    touch(archive, "2", "cover")
+
+    client = MockFeishuClient()
+    assert sync_pending(archive, client) == (0, 1)
+    assert len(client.sent("upload_all")) == 1
+    (record,) = client.sent("batch_update")[0]["records"]
+    assert "封面图" in record["fields"]
+    assert sync_pending(archive, MockFeishuClient()) == (0, 0)
+
+
+class FailingSecondCreate(MockFeishuClient):
+    def _send(self, method, path, body=None, **kw):
+        if path.endswith("batch_create") and self.sent("batch_create"):
+            return {"code": 1254000, "msg": "WrongRequestBody"}
+        return super()._send(method, path, body, **kw)
+
+
+def test_failed_chunk_keeps_earlier_chunks_recorded(archive):
+    with pytest.raises(FeishuError, match="WrongRequestBody"):
+        sync_pending(archive, FailingSecondCreate())
+    synced = [e for e in archive.entries() if e.feishu_record_id]
+    assert len(synced) == 2
+
+    client = MockFeishuClient()
+    assert sync_pending(archive, client) == (1, 0)
+    assert [len(body["records"]) for body in client.sent("batch_create")] == [1]
+
+
+def test_http_error_bodies_are_reported(monkeypatch):
+    def urlopen(req, timeout):
+        if req.full_url.endswith("tenant_access_token/internal"):
+            return io.BytesIO(json.dumps({"code": 0, "tenant_access_token": "t", "expire": 7200}).encode())
+        body = io.BytesIO(json.dumps({"code": 1254045, "msg": "FieldNameNotFound"}).encode())
+        raise urllib.error.HTTPError(req.full_url, 400, "Bad Request", {}, body)
+
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+    with pytest.raises(FeishuError, match="FieldNameNotFound"):
+        FeishuClient("a", "b", "c", "d").batch_create([{"标题": "x"}])
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from pipeline.archive import Item, read_front_matter
+from pipeline.manifest import MANIFEST_NAME, Manifest
+from pipeline.scheduler import Scheduler
+
+from .fakes import FakePlatform, make_config
+
+EPISODES = {"a": 3600, "b": 3600, "c": 3600}
+
+
+def run(tmp_path, fake: FakePlatform) -> Manifest:
+    manifest = Manifest.for_archive(tmp_path)
+    scheduler = Scheduler(make_config(tmp_path), platforms={"fake": fake}, manifest=manifest)
+    asyncio.run(scheduler.run())
+    return manifest
+
+
+def test_finished_items_are_skipped(tmp_path):
+    run(tmp_path, FakePlatform(EPISODES)).close()
+
+    fake = FakePlatform(EPISODES)
+    manifest = run(tmp_path, fake)
+    assert fake.captioned == []
+    assert all(e.complete for e in manifest.entries())
+    manifest.close()
+
+
+def test_failed_item_resumes_at_failed_stage(tmp_path):
+    fake = FakePlatform(EPISODES)
+    fake.bad_captions.add("b")
+    manifest = run(tmp_path, fake)
+    entry = manifest.get("fake", "b")
+    assert entry.failed_stage == "transcript"
+    assert entry.stages == {"captions"}
+    assert (entry.dir / "captions.json").exists()
+    manifest.close()
+
+    # Fix the leftover captions; the rerun must pick them up instead of refetching
+    (entry.dir / "captions.json").write_text(json.dumps([{"start": 0, "text": "Recovered."}]))
+    fake = FakePlatform(EPISODES)
+    manifest = run(tmp_path, fake)
+    assert fake.captioned == []
+    resumed = manifest.get("fake", "b")
+    assert resumed.complete and resumed.failed_stage is None
+    assert resumed.dir == entry.dir
+    assert "Recovered." in (entry.dir / "transcript.md").read_text()
+    assert not (entry.dir / "captions.json").exists()
+    manifest.close()
+
+
+def test_prepare_reuses_the_recorded_directory(tmp_path):
+    config = make_config(tmp_path)
+    source = config.sources[0]
+    manifest = Manifest.for_archive(tmp_path)
+    old = Item(platform="fake", source=source, id="x", title="Old title", url="u", duration_seconds=4000)
+    old.dir = tmp_path / "2024-01-01" / "fake_Fake_x"
+    old.dir.mkdir(parents=True)
+    manifest.mark_stage(old, "captions")
+    manifest.mark_failed(old, "transcript", "boom")
+
+    scheduler = Scheduler(config, platforms={"fake": FakePlatform({})}, manifest=manifest)
+    item = Item(platform="fake", source=source, id="x", title="", url="u")
+    assert scheduler.prepare(item)
+    assert item.dir == old.dir
+    assert item.title == "Old title" and item.duration_seconds == 4000
+    # The captions file is gone, so the captions stage has to run again
+    assert item.completed == set()
+    assert item.captions_path is None
+
+    (old.dir / "captions.en.vtt").write_text("WEBVTT\n")
+    again = Scheduler(config, platforms={"fake": FakePlatform({})}, manifest=manifest)
+    item = Item(platform="fake", source=source, id="x", title="", url="u")
+    assert again.prepare(item)
+    assert item.completed == {"captions"}
+    assert item.captions_path == old.dir / "captions.en.vtt"
+    manifest.close()
+
+
+def test_missing_manifest_is_rebuilt_from_metadata(tmp_path):
+    run(tmp_path, FakePlatform(EPISODES)).close()
+    for path in tmp_path.glob(MANIFEST_NAME + "*"):
+        path.unlink()
+
+    fake = FakePlatform({**EPISODES, "d": 3600})
+    manifest = run(tmp_path, fake)
+    assert fake.captioned == ["d"]
+    entries = {e.video_id: e for e in manifest.entries()}
+    assert set(entries) == {"a", "b", "c", "d"}
+    assert entries["a"].stages == {"captions", "transcript", "metadata"}
+    assert entries["a"].transcript_hash
+    assert read_front_matter(entries["a"].dir / "metadata.md")["id"] == "a"
+    manifest.close()
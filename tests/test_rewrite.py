@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from pipeline import rewrite
+from pipeline.rewrite import CompletionCache, RewriteEngine, RewriteError, StubClient, split_chunks
+
+CHINESE = "这是一个关于人工智能的句子。" * 3000  # ~42 KB, no spaces at all
+BIBIGPT = "".join(f"[{i // 60}:{i % 60:02d}] 第{i}行转录内容没有标点\n\n" for i in range(4000))
+ENGLISH = " ".join(f"Sentence number {i} is here." for i in range(3000))
+
+
+def run(engine: RewriteEngine, text: str):
+    return asyncio.run(engine.rewrite(text, "item"))
+
+
+@pytest.mark.parametrize("text", [CHINESE, BIBIGPT, ENGLISH, "a" * 30_000])
+def test_long_transcripts_are_split_into_bounded_chunks(text):
+    chunks = split_chunks(text, size=5000, overlap=400)
+    assert len(chunks) >= len(text) // 5000
+    assert all(len(c) <= 5000 for c in chunks)
+
+
+@pytest.mark.parametrize("text", [CHINESE, BIBIGPT, ENGLISH])
+def test_consecutive_chunks_overlap(text):
+    chunks = split_chunks(text, size=5000, overlap=400)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        head = nxt[:50]
+        assert head in prev[-450:]
+
+
+def test_short_transcript_is_one_call(tmp_path):
+    client = StubClient()
+    engine = RewriteEngine(client, CompletionCache(tmp_path / "cache.sqlite"))
+    article, stats = run(engine, "A short episode. Nothing else.")
+    assert client.calls == 1
+    assert stats.chunks == 1 and stats.calls == 1
+    assert article.endswith("\n")
+
+
+def test_long_transcript_maps_chunks_then_merges(tmp_path):
+    client = StubClient()
+    engine = RewriteEngine(client, CompletionCache(tmp_path / "cache.sqlite"), chunk_chars=5000)
+    _, stats = run(engine, CHINESE)
+    assert stats.chunks > 1
+    assert client.calls == stats.chunks + 1
+    assert stats.input_tokens > 0 and stats.output_tokens > 0
+    assert stats.cache_hits == 0 and stats.hit_rate == 0.0
+
+
+def test_rerun_is_served_from_cache(tmp_path):
+    cache = CompletionCache(tmp_path / "cache.sqlite")
+    first, _ = run(RewriteEngine(StubClient(), cache, chunk_chars=5000), BIBIGPT)
+
+    client = StubClient()
+    second, stats = run(RewriteEngine(client, cache, chunk_chars=5000), BIBIGPT)
+    assert second == first
+    assert client.calls == 0
+    assert stats.cache_hits == stats.calls and stats.hit_rate == 1.0
+    assert stats.input_tokens == 0
+
+
+class FailingClient(StubClient):
+    def __init__(self, marker: str):
+        super().__init__()
+        self.marker = marker
+
+    async def complete(self, prompt):
+        if self.marker in prompt:
+            raise RuntimeError("boom")
+        return await super().complete(prompt)
+
+
+def test_failed_chunk_raises_and_keeps_the_others(tmp_path, monkeypatch):
+    monkeypatch.setattr(rewrite, "RETRY_DELAY", 0)
+    cache = CompletionCache(tmp_path / "cache.sqlite")
+    chunks = split_chunks(ENGLISH, size=5000)
+    engine = RewriteEngine(FailingClient("第 2/"), cache, chunk_chars=5000)
+    with pytest.raises(RewriteError, match="1/"):
+        run(engine, ENGLISH)
+
+    client = StubClient()
+    _, stats = run(RewriteEngine(client, cache, chunk_chars=5000), ENGLISH)
+    assert stats.cache_hits == len(chunks) - 1
+    assert client.calls == 2  # the failed chunk and the merge
+
+
+def test_engine_writes_rewritten_file_and_reports(tmp_path):
+    src = tmp_path / "item" / "transcript.md"
+    src.parent.mkdir()
+    src.write_text(CHINESE, encoding="utf-8")
+    engine = RewriteEngine(StubClient(), CompletionCache(tmp_path / "cache.sqlite"), chunk_chars=5000)
+    asyncio.run(engine(src, src.with_name("rewritten.md")))
+    assert src.with_name("rewritten.md").read_text(encoding="utf-8")
+    assert len(engine.stats) == 1
+    assert "total (1 items)" in engine.report()
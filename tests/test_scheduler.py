@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+from pipeline import platforms
+from pipeline.archive import Item, read_front_matter
+from pipeline.config import Source
+from pipeline.platforms import PlatformError, YouTube
+from pipeline.scheduler import Scheduler
+
+from .fakes import FakePlatform, make_config
+
+
+def run(scheduler: Scheduler) -> None:
+    asyncio.run(scheduler.run())
+
+
+def test_min_duration_applies_before_captions(tmp_path):
+    config = make_config(tmp_path, min_duration=30)
+    fake = FakePlatform(
+        {"long": 3600, "short": 600, "unknown-long": 0, "unknown-short": 0, "unprobeable": 0},
+        probes={"unknown-long": 2400, "unknown-short": 300},
+    )
+    run(Scheduler(config, platforms={"fake": fake}))
+
+    assert sorted(fake.probed) == ["unknown-long", "unknown-short", "unprobeable"]
+    assert sorted(fake.captioned) == ["long", "unknown-long"]
+    meta = read_front_matter(next(tmp_path.glob("*/fake_Fake_unknown-long/metadata.md")))
+    assert meta["duration_seconds"] == 2400
+    assert meta["duration"] == "40:00"
+
+
+def _youtube_item(min_duration: int) -> Item:
+    source = Source(platform="youtube", name="Channel", min_duration=min_duration)
+    return Item(platform="youtube", source=source, id="abc", title="t", url="https://youtu.be/abc")
+
+
+def _fake_ytdlp(duration: int):
+    async def run_ytdlp(*args: str) -> str:
+        dest = args[args.index("-o") + 1].rsplit("/", 1)[0]
+        info = {"duration": duration, "upload_date": "20250102"}
+        with open(f"{dest}/captions.info.json", "w") as f:
+            json.dump(info, f)
+        with open(f"{dest}/captions.en.vtt", "w") as f:
+            f.write("WEBVTT\n")
+        return ""
+
+    return run_ytdlp
+
+
+def test_youtube_captions_record_duration(tmp_path, monkeypatch):
+    monkeypatch.setattr(platforms, "run_ytdlp", _fake_ytdlp(3725))
+    item = _youtube_item(min_duration=30)
+    path = asyncio.run(YouTube().fetch_captions(item, tmp_path))
+    assert path.name == "captions.en.vtt"
+    assert item.duration_seconds == 3725
+    assert item.published_at == "2025-01-02"
+
+
+def test_youtube_captions_reject_short_videos(tmp_path, monkeypatch):
+    monkeypatch.setattr(platforms, "run_ytdlp", _fake_ytdlp(600))
+    with pytest.raises(PlatformError, match="shorter"):
+        asyncio.run(YouTube().fetch_captions(_youtube_item(min_duration=30), tmp_path))
+    assert not list(tmp_path.glob("captions*"))
@@ -0,0 +1,68 @@
+import io
+
+from pipeline import vtt
+
+ROLLING = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.080 --> 00:00:02.150 align:start position:0%
+ 
+the<00:00:00.240><c> first</c><00:00:00.480><c> idea</c>
+
+00:00:02.150 --> 00:00:02.160 align:start position:0%
+the first idea
+ 
+
+00:00:02.160 --> 00:00:04.630 align:start position:0%
+the first idea
+is<00:00:02.400><c> good."</c><00:00:02.800><c> &gt;&gt;</c><00:00:03.000><c> Q&amp;A</c>
+
+00:00:04.630 --> 00:00:04.640 align:start position:0%
+is good." &gt;&gt; Q&amp;A
+ 
+
+00:00:04.640 --> 00:00:06.000 align:start position:0%
+is good." &gt;&gt; Q&amp;A
+time?
+"""
+
+
+def transcript(text: str, timestamps: bool = False) -> str:
+    out = io.StringIO()
+    vtt.write_transcript(io.StringIO(text), out, timestamps=timestamps)
+    return out.getvalue()
+
+
+def test_rolling_lines_are_deduplicated_and_tags_stripped():
+    assert transcript(ROLLING) == 'the first idea is good." >> Q&A time?\n'
+
+
+def test_closing_quotes_stay_with_the_sentence():
+    sentences = [s for _, s in vtt.iter_sentences(vtt.iter_caption_lines(vtt.iter_cues(io.StringIO(ROLLING))))]
+    assert sentences == ['the first idea is good."', ">> Q&A time?"]
+
+
+def test_timestamped_output():
+    assert transcript(ROLLING, timestamps=True) == (
+        '[0:00] the first idea is good."\n\n[0:02] >> Q&A time?\n\n'
+    )
+
+
+def test_unpunctuated_lines_are_cut_at_max_sentence_chars():
+    words = [(float(i), "word " * 20) for i in range(100)]
+    sentences = list(vtt.iter_sentences(words, max_chars=300))
+    assert len(sentences) > 1
+    assert all(len(s) <= 300 + 100 for _, s in sentences)
+    assert sum(s.count("word") for _, s in sentences) == 2000
+
+
+def test_format_timestamp():
+    assert vtt.format_timestamp(5.9) == "[0:05]"
+    assert vtt.format_timestamp(125) == "[2:05]"
+    assert vtt.format_timestamp(3723) == "[1:02:03]"
+
+
+def test_hour_long_timing_lines_parse():
+    cues = list(vtt.iter_cues(io.StringIO("WEBVTT\n\n01:02:03.500 --> 01:02:05.000\nhello\n")))
+    assert cues == [(3723.5, ["hello"])]